@@ -0,0 +1,18 @@
+import type { BeefPartInsights } from "../types"
+
+// One request per part, shared by every click on that part
+const insightsCache = new Map<string, Promise<BeefPartInsights>>()
+
+export function loadBeefPartInsights(partId: string): Promise<BeefPartInsights> {
+  let pending = insightsCache.get(partId)
+  if (!pending) {
+    pending = fetch(`/data/beef_parts/${partId}.json`).then(res => {
+      if (!res.ok) throw new Error(`Failed to load insights for ${partId} (${res.status})`)
+      return res.json() as Promise<BeefPartInsights>
+    })
+    // Drop failed requests so the next click retries
+    pending.catch(() => insightsCache.delete(partId))
+    insightsCache.set(partId, pending)
+  }
+  return pending
+}
@@ -11,6 +11,8 @@ type LabeledWord = {
   zh: string
   en: string
   frequency: number
+  // Approximate distinct users (present when reach sketches were built)
+  reach?: number
   labels: string[]
 }
 
@@ -33,11 +35,13 @@ type TabKey = 'categories' | 'top100' | 'origins'
 interface CountryData {
   name: string
   frequency: number
+  reach?: number
   percentage: number
   words: Array<{
     zh: string
     en: string
     frequency: number
+    reach?: number
   }>
 }
 
@@ -48,6 +48,29 @@ export interface BeefPart {
   };
 }
 
+// Corpus insights for a beef part, precomputed by utils/beef_parts.py
+export interface BeefPartMentionCount {
+  word: string;
+  count: number;
+}
+
+export interface BeefPartInsights {
+  id: string;
+  name: string;
+  name_zh: string;
+  mentions: number;
+  documents: number;
+  engagement_score: number;
+  qualities: BeefPartMentionCount[];
+  cooking_methods: BeefPartMentionCount[];
+  top_snippets: {
+    type: 'note' | 'comment';
+    id: string;
+    note_id: string;
+    engagement: number;
+  }[];
+}
+
 // Translation types
 export interface TranslationData {
   chinese: string;
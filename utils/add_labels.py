@@ -4,10 +4,11 @@
 Add labels to words for better user demand analysis
 """
 
-import json
 import re
 from typing import List, Dict
 
+from word_records import load_word_records, save_word_records
+
 def categorize_word(word: str, english: str) -> List[str]:
     """
     Categorize a word based on its meaning and context
@@ -114,45 +115,27 @@ def add_labels_to_words(input_file: str, output_file: str, min_frequency: int =
         min_frequency (int): Minimum frequency threshold
     """
     # Load data
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_word_records(input_file)
     
     # Filter words with frequency >= min_frequency
-    filtered_data = [word for word in data if word['frequency'] >= min_frequency]
+    labeled_data = [word for word in data if word.frequency >= min_frequency]
     
     print(f"Total words: {len(data)}")
-    print(f"Words with frequency >= {min_frequency}: {len(filtered_data)}")
-    
-    # Add labels to each word
-    labeled_data = []
-    for word_obj in filtered_data:
-        word = word_obj['zh']
-        english = word_obj['en']
-        frequency = word_obj['frequency']
-        
-        # Get labels for this word
-        labels = categorize_word(word, english)
-        
-        # Create new object with labels
-        labeled_obj = {
-            'zh': word,
-            'en': english,
-            'frequency': frequency,
-            'labels': labels
-        }
-        
-        labeled_data.append(labeled_obj)
+    print(f"Words with frequency >= {min_frequency}: {len(labeled_data)}")
+    
+    # Add labels to each word in place
+    for word_obj in labeled_data:
+        word_obj.set_labels(categorize_word(word_obj.zh, word_obj.en))
     
     # Save labeled data
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(labeled_data, f, ensure_ascii=False, indent=2)
+    save_word_records(labeled_data, output_file)
     
     print(f"Labeled data saved to: {output_file}")
     
     # Analyze label distribution
     label_counts = {}
     for word_obj in labeled_data:
-        for label in word_obj['labels']:
+        for label in word_obj.labels:
             label_counts[label] = label_counts.get(label, 0) + 1
     
     print("\nLabel distribution:")
@@ -162,7 +145,7 @@ def add_labels_to_words(input_file: str, output_file: str, min_frequency: int =
     # Show some examples
     print("\nExample labeled words:")
     for i, word_obj in enumerate(labeled_data[:10]):
-        print(f"  {word_obj['zh']} ({word_obj['frequency']}) -> {word_obj['labels']}")
+        print(f"  {word_obj.zh} ({word_obj.frequency}) -> {list(word_obj.labels)}")
 
 if __name__ == "__main__":
     input_file = "word_frequency/xhs_all_content_wordcloud_frequencies_translated.json"
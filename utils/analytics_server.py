@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local analytics query service for the consumer analysis page.
+
+Loads the labeled vocabularies, the country mapping and the raw corpus into
+in-memory indexes once, then answers filtered queries with responses in
+the labeled.json / country_analysis.json formats:
+
+    GET /data/labeled.json?label=brand&country=Japan&start=2025-08-01&end=2025-08-14&min_frequency=2
+    GET /data/country_analysis.json?label=price_value&start=2025-08-01
+
+Each endpoint reads the same vocabulary file as the script that writes its
+static counterpart (public/data/labeled.json for labeled.json, the compact
+labeled words for process_countries). Without query parameters the
+responses are the vocabulary's own frequencies, pretty-printed, so they
+match the static files byte for byte.
+
+With any filter, frequencies are recounted from the documents that pass
+it, by tokenizing the corpus with the current tokenizer, text normalization
+and alias file (as build_frequencies counts them). These counts can
+differ from the vocabulary's frequencies (which come from the pipeline run
+that produced the file), even for a filter that keeps every document.
+"""
+
+import argparse
+import bisect
+import glob
+import hashlib
+import os
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from json_codec import decode_records, dumps
+from normalize_text import ALIAS_FILE, Normalizer, load_aliases
+from process_countries import country_of, create_output, process_country_frequencies
+from text_tokens import document_tokens, note_text
+from word_records import WordRecord, load_word_records
+
+MS_PER_DAY = 86400000
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def parse_day(value: Optional[str]) -> Optional[int]:
+    """'YYYY-MM-DD' -> days since epoch (None passes through)."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value).toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+class CorpusIndex:
+    """
+    Documents sorted by day, each stored as a CSR row of (word id, count)
+    over the given words, plus word -> documents postings.
+    """
+
+    def __init__(self, words: List[str], json_dir: str, normalizer: Optional[Normalizer] = None):
+        self.word_ids = {zh: i for i, zh in enumerate(words)}
+        self.normalizer = normalizer
+        # Normalized tokens count towards the first vocabulary word with that canonical form
+        self.token_ids: Dict[str, int] = {}
+        for zh, i in self.word_ids.items():
+            self.token_ids.setdefault(normalizer(zh) if normalizer else zh, i)
+
+        rows: List[Tuple[int, Counter]] = []
+        for path in sorted(glob.glob(os.path.join(json_dir, 'search_contents_*.json'))):
+            for note in decode_records(path, 'note'):
+                rows.append((note.get('time') or 0, self._count(note_text(note))))
+        for path in sorted(glob.glob(os.path.join(json_dir, 'search_comments_*.json'))):
+            for comment in decode_records(path, 'comment'):
+                rows.append((comment.get('create_time') or 0, self._count(comment.get('content') or '')))
+        rows.sort(key=lambda r: r[0])
+
+        self.doc_days = array('l', (ts // MS_PER_DAY for ts, _ in rows))
+        self.offsets = array('l', [0])
+        self.entry_words = array('l')
+        self.entry_counts = array('l')
+        postings: Dict[int, array] = defaultdict(lambda: array('l'))
+        for doc, (_, counts) in enumerate(rows):
+            for word_id, count in counts.items():
+                self.entry_words.append(word_id)
+                self.entry_counts.append(count)
+                postings[word_id].append(doc)
+            self.offsets.append(len(self.entry_words))
+        self.postings = dict(postings)
+
+    def __len__(self) -> int:
+        return len(self.doc_days)
+
+    def _count(self, text: str) -> Counter:
+        ids = self.token_ids
+        return Counter(ids[t] for t in document_tokens(text, self.normalizer) if t in ids)
+
+    def day_range(self, start: Optional[int], end: Optional[int]) -> range:
+        """Documents whose day lies in [start, end] (inclusive, either side open)."""
+        lo = 0 if start is None else bisect.bisect_left(self.doc_days, start)
+        hi = len(self.doc_days) if end is None else bisect.bisect_right(self.doc_days, end)
+        return range(lo, hi)
+
+    def docs_with_any(self, word_ids: List[int]) -> frozenset:
+        docs = set()
+        for word_id in word_ids:
+            docs.update(self.postings.get(word_id, ()))
+        return frozenset(docs)
+
+    def word_frequencies(self, docs) -> Counter:
+        frequencies: Counter = Counter()
+        offsets, entry_words, entry_counts = self.offsets, self.entry_words, self.entry_counts
+        for doc in docs:
+            for pos in range(offsets[doc], offsets[doc + 1]):
+                frequencies[entry_words[pos]] += entry_counts[pos]
+        return frequencies
+
+
+class Vocabulary:
+    """One labeled word list, with label and country indexes into the corpus word ids."""
+
+    def __init__(self, words: List[WordRecord], corpus_ids: List[int]):
+        self.words = words
+        self.corpus_ids = corpus_ids
+        self.label_words: Dict[str, List[int]] = defaultdict(list)
+        self.country_words: Dict[str, List[int]] = defaultdict(list)
+        for i, w in enumerate(words):
+            for label in w.labels:
+                self.label_words[label].append(i)
+            country = country_of(w.en, w.labels)
+            if country:
+                self.country_words[country].append(i)
+
+    def frequencies(self, corpus_counts: Optional[Counter]) -> List[int]:
+        """Vocabulary frequencies, or recounted ones when documents were filtered."""
+        if corpus_counts is None:
+            return [w.frequency for w in self.words]
+        return [corpus_counts.get(i, 0) for i in self.corpus_ids]
+
+
+class AnalyticsService:
+    """In-memory indexes plus an LRU cache of encoded responses keyed by query."""
+
+    def __init__(self, vocabulary_file: str, country_vocabulary_file: str, json_dir: str,
+                 cache_size: int = 512, alias_file: Optional[str] = ALIAS_FILE):
+        word_lists = {
+            'labeled': load_word_records(vocabulary_file),
+            'countries': load_word_records(country_vocabulary_file),
+        }
+        # One corpus index over the union of both vocabularies
+        all_words = list(dict.fromkeys(w.zh for words in word_lists.values() for w in words))
+        self.corpus = CorpusIndex(all_words, json_dir, Normalizer(load_aliases(alias_file)))
+        self.vocabularies = {
+            kind: Vocabulary(words, [self.corpus.word_ids[w.zh] for w in words])
+            for kind, words in word_lists.items()
+        }
+
+        # Document sets per (vocabulary, label / country filter), built on first use
+        self._filter_docs: Dict[tuple, frozenset] = {}
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[tuple, Tuple[bytes, str]]' = OrderedDict()
+
+    def _selected_docs(self, kind, start, end, label=None, country=None):
+        """None means 'no document filter' (use the vocabulary's own frequencies)."""
+        if start is None and end is None and label is None and country is None:
+            return None
+        vocabulary = self.vocabularies[kind]
+        docs = self.corpus.day_range(start, end)
+        for key in (('label', label), ('country', country)):
+            if key[1] is None:
+                continue
+            filter_docs = self._filter_docs.get((kind,) + key)
+            if filter_docs is None:
+                index = vocabulary.label_words if key[0] == 'label' else vocabulary.country_words
+                ids = [vocabulary.corpus_ids[i] for i in index.get(key[1], [])]
+                filter_docs = self._filter_docs[(kind,) + key] = self.corpus.docs_with_any(ids)
+            # docs is a range or a frozenset, so membership stays O(1)
+            docs = frozenset(d for d in filter_docs if d in docs)
+        return docs
+
+    def _frequencies(self, kind: str, docs) -> List[int]:
+        counts = None if docs is None else self.corpus.word_frequencies(docs)
+        return self.vocabularies[kind].frequencies(counts)
+
+    def labeled(self, label, country, start, end, min_frequency) -> list:
+        vocabulary = self.vocabularies['labeled']
+        frequencies = self._frequencies('labeled', self._selected_docs('labeled', start, end, country=country))
+        candidates = vocabulary.label_words.get(label, []) if label else range(len(vocabulary.words))
+        out = []
+        for i in candidates:
+            if frequencies[i] >= max(min_frequency, 1):
+                word = vocabulary.words[i].to_dict()
+                word['frequency'] = frequencies[i]
+                out.append(word)
+        out.sort(key=lambda x: x['frequency'], reverse=True)
+        return out
+
+    def country_analysis(self, label, start, end) -> dict:
+        vocabulary = self.vocabularies['countries']
+        frequencies = self._frequencies('countries', self._selected_docs('countries', start, end, label=label))
+        data = [
+            {**w.to_dict(), 'frequency': frequencies[i]}
+            for i, w in enumerate(vocabulary.words) if frequencies[i]
+        ]
+        totals, country_words, _ = process_country_frequencies(data, country_of.mapping)
+        return create_output(totals, country_words)
+
+    def respond(self, kind: str, query: dict) -> Tuple[bytes, str]:
+        """Encoded body and ETag for a query, served from the LRU cache when possible."""
+        label = query.get('label') or None
+        country = query.get('country') or None
+        start = parse_day(query.get('start'))
+        end = parse_day(query.get('end'))
+        try:
+            min_frequency = int(query.get('min_frequency') or 1)
+        except ValueError:
+            raise web.HTTPBadRequest(text="min_frequency must be an integer")
+
+        key = (kind, label, country, start, end, min_frequency if kind == 'labeled' else None)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        if kind == 'labeled':
+            result = self.labeled(label, country, start, end, min_frequency)
+        else:
+            result = self.country_analysis(label, start, end)
+        body = dumps(result, pretty=True)
+        entry = (body, '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"')
+        self._cache[key] = entry
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return entry
+
+
+def json_handler(service: AnalyticsService, kind: str):
+    async def handler(request: web.Request) -> web.Response:
+        body, etag = service.respond(kind, request.query)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in request.headers.get('If-None-Match', ''):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type='application/json', headers=headers)
+    return handler
+
+
+def create_app(service: AnalyticsService) -> web.Application:
+    app = web.Application()
+
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response({
+            'words': {kind: len(v.words) for kind, v in service.vocabularies.items()},
+            'documents': len(service.corpus),
+        })
+
+    app.router.add_get('/data/labeled.json', json_handler(service, 'labeled'))
+    app.router.add_get('/data/country_analysis.json', json_handler(service, 'countries'))
+    app.router.add_get('/health', health)
+    return app
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Local analytics query service')
+    parser.add_argument('--vocabulary', default='public/data/labeled.json',
+                        help='words served by /data/labeled.json')
+    parser.add_argument('--country-vocabulary',
+                        default='word_frequency/xhs_all_content_wordcloud_frequencies_compact_labeled.json',
+                        help='labeled words aggregated by /data/country_analysis.json (process_countries input)')
+    parser.add_argument('--json-dir', default='word_frequency/json')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--cache-size', type=int, default=512)
+    parser.add_argument('--aliases', default=ALIAS_FILE, help='alias file used by build_frequencies')
+    args = parser.parse_args()
+
+    service = AnalyticsService(args.vocabulary, args.country_vocabulary, args.json_dir, args.cache_size,
+                               args.aliases)
+    print(f"Indexed {len(service.corpus.word_ids)} words and {len(service.corpus)} documents")
+    web.run_app(create_app(service), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
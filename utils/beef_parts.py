@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Beef cut mention index for the beef interactive page: one small JSON per
+cut with mentions, engagement, co-mentioned qualities/cooking methods and
+top snippet ids
+"""
+
+import glob
+import heapq
+import math
+import os
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from compact_labeling import COMPACT_CATEGORIES
+from json_codec import decode_records, dump_json
+from keyword_automaton import KeywordAutomaton
+from text_tokens import note_text
+
+# Cut id -> display names and aliases (Australian retail names + Chinese names)
+BEEF_CUTS = {
+    'oyster_blade': {'en': 'Oyster Blade', 'zh': '板腱',
+                     'aliases': ['oyster blade', 'blade steak', '板腱', '肩胛', '牡蛎肉']},
+    'eye_fillet': {'en': 'Eye Fillet', 'zh': '眼肉',
+                   'aliases': ['eye fillet', 'tenderloin', '眼肉', '菲力', '牛柳', '里脊', '里脊肉']},
+    'scotch_fillet': {'en': 'Scotch Fillet', 'zh': '肉眼',
+                      'aliases': ['scotch fillet', 'ribeye', 'rib eye', 'rib fillet', '肉眼', '上脑']},
+    'rump': {'en': 'Rump', 'zh': '臀肉',
+             'aliases': ['rump', 'rump cap', 'picanha', '臀肉', '臀盖', '臀尖', '臀腰']},
+    'sirloin': {'en': 'Sirloin / Porterhouse', 'zh': '西冷',
+                'aliases': ['sirloin', 'porterhouse', 'striploin', '西冷', '沙朗', '吊龙']},
+    'brisket': {'en': 'Brisket', 'zh': '牛腩',
+                'aliases': ['brisket', '牛腩', '牛胸']},
+    'chuck': {'en': 'Chuck', 'zh': '肩肉',
+              'aliases': ['chuck', 'chuck roll', '肩肉']},
+    'short_rib': {'en': 'Short Rib', 'zh': '牛小排',
+                  'aliases': ['short rib', 'short ribs', '牛小排', '肋条', '牛肋']},
+    'shank': {'en': 'Shin / Shank', 'zh': '牛腱',
+              'aliases': ['shank', 'shin', 'gravy beef', '腱子', '牛腱']},
+    'flank': {'en': 'Flank', 'zh': '牛腹',
+              'aliases': ['flank', 'flank steak', '牛腹']},
+    'skirt': {'en': 'Skirt', 'zh': '裙边',
+              'aliases': ['skirt', 'skirt steak', '封门柳', '牛裙']},
+    'topside': {'en': 'Topside / Silverside', 'zh': '和尚头',
+                'aliases': ['topside', 'silverside', '和尚头', '黄瓜条']},
+    't_bone': {'en': 'T-Bone', 'zh': '丁骨',
+               'aliases': ['t-bone', 't bone', '丁骨']},
+}
+
+# Other meats named with a cut alias (猪里脊, 糖醋里脊 is a pork dish). These
+# match first under leftmost-longest matching and are then ignored.
+NOT_BEEF = ['猪里脊', '猪小里脊', '鸡里脊', '羊里脊', '糖醋里脊']
+
+TOP_SNIPPETS = 5
+TOP_CO_MENTIONS = 10
+
+
+def build_automata() -> Tuple[KeywordAutomaton, KeywordAutomaton]:
+    """
+    Cut aliases and co-mention keywords (quality words, cooking methods) in
+    separate automata, so a cooking word such as 烤肉 cannot take the
+    characters of a cut such as 肉眼 in '烤肉眼牛排'.
+    """
+    cuts = KeywordAutomaton()
+    for cut_id, cut in BEEF_CUTS.items():
+        for alias in cut['aliases']:
+            cuts.add(alias, cut_id)
+    for name in NOT_BEEF:
+        cuts.add(name, None)
+    cuts.build()
+
+    co_mentions = KeywordAutomaton()
+    for kw in COMPACT_CATEGORIES['quality']:
+        co_mentions.add(kw, ('quality', kw))
+    for kw in COMPACT_CATEGORIES['cooking_usage']:
+        co_mentions.add(kw, ('cooking', kw))
+    co_mentions.build()
+    return cuts, co_mentions
+
+
+def top_words(counts: Counter, n: int) -> List[dict]:
+    """Most frequent words, ties broken by the word so reruns give identical files."""
+    ranked = sorted(counts.items(), key=lambda x: (-x[1], x[0]))[:n]
+    return [{'word': w, 'count': c} for w, c in ranked]
+
+
+def parse_count(value) -> int:
+    """Crawler counts are strings like '71', '1.2万' or '10万+'."""
+    if isinstance(value, int):
+        return value
+    text = str(value or '').strip().rstrip('+')
+    multiplier = 1
+    if text.endswith('万'):
+        multiplier, text = 10000, text[:-1]
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        return 0
+
+
+class CutStats:
+    __slots__ = ('mentions', 'documents', 'score', 'qualities', 'cooking', 'snippets')
+
+    def __init__(self):
+        self.mentions = 0
+        self.documents = 0
+        self.score = 0.0
+        self.qualities: Counter = Counter()
+        self.cooking: Counter = Counter()
+        # Min-heap of (engagement, kind, id, note_id), size <= TOP_SNIPPETS
+        self.snippets: List[Tuple[int, str, str, str]] = []
+
+
+class CutIndex:
+    """Single scan over notes and comments, updating every cut found in a document."""
+
+    def __init__(self):
+        self.cut_automaton, self.co_mention_automaton = build_automata()
+        self.stats: Dict[str, CutStats] = {cut_id: CutStats() for cut_id in BEEF_CUTS}
+        self.documents = 0
+
+    def add_document(self, text: str, engagement: int, kind: str, doc_id: str, note_id: str):
+        self.documents += 1
+        cut_mentions = Counter(cut_id for _, _, cut_id in self.cut_automaton.find(text) if cut_id)
+        if not cut_mentions:
+            return
+        qualities = set()
+        cooking = set()
+        # Overlapping matches are fine here: each keyword counts once per document
+        for _, _, (tag, key) in self.co_mention_automaton.find_all(text):
+            if tag == 'quality':
+                qualities.add(key)
+            else:
+                cooking.add(key)
+
+        weight = 1 + math.log1p(engagement)
+        for cut_id, count in cut_mentions.items():
+            stats = self.stats[cut_id]
+            stats.mentions += count
+            stats.documents += 1
+            stats.score += weight
+            stats.qualities.update(qualities)
+            stats.cooking.update(cooking)
+            entry = (engagement, kind, doc_id, note_id)
+            if len(stats.snippets) < TOP_SNIPPETS:
+                heapq.heappush(stats.snippets, entry)
+            elif entry > stats.snippets[0]:
+                heapq.heapreplace(stats.snippets, entry)
+
+    def add_note(self, note: dict):
+        engagement = sum(parse_count(note.get(field)) for field in
+                         ('liked_count', 'collected_count', 'comment_count', 'share_count'))
+        self.add_document(note_text(note), engagement, 'note', note['note_id'], note['note_id'])
+
+    def add_comment(self, comment: dict):
+        self.add_document(comment.get('content') or '', parse_count(comment.get('like_count')),
+                          'comment', comment['comment_id'], comment['note_id'])
+
+    def part_payload(self, cut_id: str) -> dict:
+        cut = BEEF_CUTS[cut_id]
+        stats = self.stats[cut_id]
+        return {
+            'id': cut_id,
+            'name': cut['en'],
+            'name_zh': cut['zh'],
+            'mentions': stats.mentions,
+            'documents': stats.documents,
+            'engagement_score': round(stats.score, 2),
+            'qualities': top_words(stats.qualities, TOP_CO_MENTIONS),
+            'cooking_methods': top_words(stats.cooking, TOP_CO_MENTIONS),
+            'top_snippets': [
+                {'type': kind, 'id': doc_id, 'note_id': note_id, 'engagement': engagement}
+                for engagement, kind, doc_id, note_id in sorted(stats.snippets, reverse=True)
+            ],
+        }
+
+
+def build_cut_index(json_dir: str) -> CutIndex:
+    """Scan every note and comment shard once."""
+    index = CutIndex()
+    for path in sorted(glob.glob(os.path.join(json_dir, 'search_contents_*.json'))):
+        for note in decode_records(path, 'note'):
+            index.add_note(note)
+    for path in sorted(glob.glob(os.path.join(json_dir, 'search_comments_*.json'))):
+        for comment in decode_records(path, 'comment'):
+            index.add_comment(comment)
+    return index
+
+
+def write_beef_parts(index: CutIndex, output_dir: str):
+    """Write <cut_id>.json per cut plus a small index.json overview."""
+    os.makedirs(output_dir, exist_ok=True)
+    overview = []
+    for cut_id in BEEF_CUTS:
+        payload = index.part_payload(cut_id)
+        dump_json(payload, os.path.join(output_dir, f'{cut_id}.json'))
+        overview.append({key: payload[key] for key in ('id', 'name', 'name_zh', 'mentions', 'engagement_score')})
+    overview.sort(key=lambda x: x['engagement_score'], reverse=True)
+    dump_json({'parts': overview, 'documents_scanned': index.documents}, os.path.join(output_dir, 'index.json'))
+
+
+def main():
+    """Main function"""
+    json_dir = 'word_frequency/json'
+    output_dir = 'public/data/beef_parts'
+
+    index = build_cut_index(json_dir)
+    write_beef_parts(index, output_dir)
+
+    print(f"Scanned {index.documents} notes and comments → {output_dir}/")
+    for cut_id, stats in sorted(index.stats.items(), key=lambda x: x[1].score, reverse=True):
+        print(f"  {BEEF_CUTS[cut_id]['en']}: {stats.mentions} mentions in {stats.documents} documents, "
+              f"score {stats.score:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Build word frequencies from crawled notes and comments, with approximate
+distinct-user reach per word (HyperLogLog).
+
+With --approx, counting runs in bounded memory (Count-Min Sketch +
+Space-Saving) and only the top-k words are written. With --sample, only a
+reproducible stratified sample of notes is counted and the counts are
+scaled back up (see preview_pipeline for confidence intervals).
+
+Text is normalized before tokenizing (width, traditional -> simplified,
+case) and tokens are mapped through the alias table, so variants are
+counted as one word; their original spellings go to a variant index.
+"""
+
+import argparse
+import glob
+import os
+import re
+from collections import Counter
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
+from hyperloglog import DEFAULT_PRECISION, HyperLogLog, save_sketches
+from json_codec import decode_records, dump_json
+from normalize_text import Normalizer, load_aliases
+from sampling import scaled_counts, stratified_sample
+from streaming_counts import HeavyHitters
+from text_tokens import document_tokens, note_text
+
+SHARD_DATE = re.compile(r'search_(?:contents|comments)_(\d{4}-\d{2}-\d{2})\.json$')
+
+
+def find_shards(json_dir: str) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """Return (date, contents file, comments file) for every daily crawl shard."""
+    shards: Dict[str, Dict[str, str]] = {}
+    for path in glob.glob(os.path.join(json_dir, 'search_*_*.json')):
+        match = SHARD_DATE.search(os.path.basename(path))
+        if not match:
+            continue
+        kind = 'contents' if '_contents_' in path else 'comments'
+        shards.setdefault(match.group(1), {})[kind] = path
+    return [(date, files.get('contents'), files.get('comments')) for date, files in sorted(shards.items())]
+
+
+def iter_documents(contents_file: Optional[str], comments_file: Optional[str]):
+    """Yield (text, user_id) for each note (author) and comment (commenter)."""
+    if contents_file:
+        for note in decode_records(contents_file, 'note'):
+            yield note_text(note), note.get('user_id') or ''
+    if comments_file:
+        for comment in decode_records(comments_file, 'comment'):
+            yield comment.get('content') or '', comment.get('user_id') or ''
+
+
+def count_shard(shard: Tuple[str, Optional[str], Optional[str]], precision: int = DEFAULT_PRECISION,
+                normalizer: Optional[Normalizer] = None) -> Tuple[Counter, Dict[str, HyperLogLog], Dict[str, str]]:
+    """Count one daily shard: word frequencies, a reach sketch per word and the variants seen."""
+    _, contents_file, comments_file = shard
+    frequencies: Counter = Counter()
+    sketches: Dict[str, HyperLogLog] = {}
+    variants: Dict[str, str] = {}
+    for text, user_id in iter_documents(contents_file, comments_file):
+        tokens = document_tokens(text, normalizer, variants)
+        frequencies.update(tokens)
+        if not user_id:
+            continue
+        for token in set(tokens):
+            sketch = sketches.get(token)
+            if sketch is None:
+                sketch = sketches[token] = HyperLogLog(precision)
+            sketch.add(user_id)
+    return frequencies, sketches, variants
+
+
+def _count_shard_args(args):
+    return count_shard(*args)
+
+
+def build_frequencies(json_dir: str, precision: int = DEFAULT_PRECISION, workers: int = 1,
+                      normalizer: Optional[Normalizer] = None
+                      ) -> Tuple[Counter, Dict[str, HyperLogLog], Dict[str, str]]:
+    """
+    Count all shards in json_dir, merging per-shard results
+
+    Args:
+        json_dir (str): Directory holding search_contents_*/search_comments_* files
+        precision (int): HyperLogLog precision (registers = 2**precision)
+        workers (int): Number of worker processes (one shard per task)
+        normalizer (Normalizer): Text/alias normalization, None to count raw tokens
+
+    Returns:
+        Tuple[Counter, Dict[str, HyperLogLog], Dict[str, str]]: frequencies,
+        reach sketches and the variant -> canonical index
+    """
+    shards = find_shards(json_dir)
+    print(f"Found {len(shards)} daily shards in {json_dir}")
+
+    tasks = [(shard, precision, normalizer) for shard in shards]
+    if workers > 1 and len(tasks) > 1:
+        with Pool(workers) as pool:
+            results = pool.imap_unordered(_count_shard_args, tasks)
+            return merge_results(results, precision)
+    return merge_results(map(_count_shard_args, tasks), precision)
+
+
+def merge_results(results, precision: int = DEFAULT_PRECISION
+                  ) -> Tuple[Counter, Dict[str, HyperLogLog], Dict[str, str]]:
+    """Merge (frequencies, sketches, variants) from shards or workers."""
+    frequencies: Counter = Counter()
+    sketches: Dict[str, HyperLogLog] = {}
+    variants: Dict[str, str] = {}
+    for shard_frequencies, shard_sketches, shard_variants in results:
+        frequencies.update(shard_frequencies)
+        variants.update(shard_variants)
+        for word, sketch in shard_sketches.items():
+            merged = sketches.get(word)
+            if merged is None:
+                sketches[word] = sketch
+            else:
+                merged.merge(sketch)
+    return frequencies, sketches, variants
+
+
+def count_shard_approx(shard: Tuple[str, Optional[str], Optional[str]], top_k: int,
+                       epsilon: float, delta: float,
+                       normalizer: Optional[Normalizer] = None) -> Tuple[HeavyHitters, Dict[str, str]]:
+    """Count one daily shard into a fixed-size heavy-hitters summary."""
+    _, contents_file, comments_file = shard
+    counter = HeavyHitters(top_k, epsilon, delta)
+    variants: Dict[str, str] = {}
+    limit = 2 * top_k
+    for text, _ in iter_documents(contents_file, comments_file):
+        counter.update(document_tokens(text, normalizer, variants))
+        if len(variants) > limit:
+            variants = tracked_variants(variants, counter)
+            limit = 2 * max(top_k, len(variants))
+    return counter, tracked_variants(variants, counter)
+
+
+def tracked_variants(variants: Dict[str, str], counter: HeavyHitters) -> Dict[str, str]:
+    """
+    Variants whose canonical word is still in the top-k summary, so the
+    variant index stays bounded by the summary size, not the vocabulary
+    """
+    tracked = counter.summary.counts
+    return {variant: canonical for variant, canonical in variants.items() if canonical in tracked}
+
+
+def _count_shard_approx_args(args):
+    return count_shard_approx(*args)
+
+
+def build_frequencies_approx(json_dir: str, top_k: int = 5000, epsilon: float = 0.0005,
+                             delta: float = 0.001, workers: int = 1,
+                             normalizer: Optional[Normalizer] = None) -> Tuple[HeavyHitters, Dict[str, str]]:
+    """
+    Approximate counterpart of build_frequencies with memory independent of
+    vocabulary size. Per-shard summaries are merged, so shards can be
+    counted by separate workers or on separate days.
+    """
+    shards = find_shards(json_dir)
+    print(f"Found {len(shards)} daily shards in {json_dir} (approximate mode, top {top_k})")
+
+    tasks = [(shard, top_k, epsilon, delta, normalizer) for shard in shards]
+    merged = HeavyHitters(top_k, epsilon, delta)
+    variants: Dict[str, str] = {}
+
+    def merge(results):
+        nonlocal variants
+        for counter, shard_variants in results:
+            merged.merge(counter)
+            variants.update(shard_variants)
+            variants = tracked_variants(variants, merged)
+
+    if workers > 1 and len(tasks) > 1:
+        with Pool(workers) as pool:
+            merge(pool.imap_unordered(_count_shard_approx_args, tasks))
+    else:
+        merge(map(_count_shard_approx_args, tasks))
+    return merged, variants
+
+
+def sample_unit_counts(json_dir: str, fraction: float, seed: int = 0,
+                       normalizer: Optional[Normalizer] = None):
+    """
+    Stratified sample of notes (with their comments) per shard, tokenized per note
+
+    Returns:
+        (strata, per-stratum lists of per-note Counters, variant -> canonical index)
+    """
+    shards = find_shards(json_dir)
+    strata = stratified_sample(shards, fraction, seed)
+    sampled = sum(len(s.units) for s in strata)
+    population = sum(s.population for s in strata)
+    print(f"Found {len(shards)} daily shards in {json_dir} (sampled {sampled} of {population} notes, seed {seed})")
+
+    variants: Dict[str, str] = {}
+    unit_counts = {
+        s.name: [
+            Counter(t for text, _ in documents for t in document_tokens(text, normalizer, variants))
+            for _, documents in s.units
+        ]
+        for s in strata
+    }
+    return strata, unit_counts, variants
+
+
+def build_frequencies_sample(json_dir: str, fraction: float, seed: int = 0,
+                             normalizer: Optional[Normalizer] = None) -> Tuple[Counter, Dict[str, str]]:
+    """Estimated population frequencies from a stratified sample, plus the variants seen."""
+    strata, unit_counts, variants = sample_unit_counts(json_dir, fraction, seed, normalizer)
+    return scaled_counts(strata, unit_counts), variants
+
+
+def save_variant_index(index: Dict[str, str], file_path: str):
+    """Save the variant -> canonical index, grouped by canonical word."""
+    dump_json(dict(sorted(index.items(), key=lambda x: (x[1], x[0]))), file_path)
+
+
+def save_frequencies(frequencies: Counter, file_path: str):
+    """Save frequencies in the {zh, frequency} format used by translate_words."""
+    data = [{'zh': word, 'frequency': freq} for word, freq in frequencies.most_common()]
+    dump_json(data, file_path)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--json-dir', default='word_frequency/json')
+    parser.add_argument('--output', default='word_frequency/xhs_all_content_wordcloud_frequencies.json')
+    parser.add_argument('--sketches', default='word_frequency/xhs_all_content_reach_sketches.json')
+    parser.add_argument('--precision', type=int, default=DEFAULT_PRECISION)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--approx', action='store_true',
+                        help='bounded-memory counting; writes only the top-k words, no reach')
+    parser.add_argument('--top-k', type=int, default=5000)
+    parser.add_argument('--epsilon', type=float, default=0.0005,
+                        help='Count-Min additive error as a fraction of all tokens')
+    parser.add_argument('--delta', type=float, default=0.001,
+                        help='probability of exceeding the Count-Min error bound')
+    parser.add_argument('--sample', type=float, metavar='FRACTION',
+                        help='count a stratified sample of notes (e.g. 0.1) and scale up; no reach')
+    parser.add_argument('--seed', type=int, default=0, help='sampling seed')
+    parser.add_argument('--aliases', default='word_frequency/aliases.json',
+                        help='optional {variant: canonical} JSON merged over the built-in aliases')
+    parser.add_argument('--variants', default='word_frequency/xhs_all_content_variant_index.json',
+                        help='where to write the variant -> canonical index')
+    parser.add_argument('--no-normalize', action='store_true', help='count raw tokens without normalization')
+    args = parser.parse_args()
+    if args.sample is not None and not 0 < args.sample <= 1:
+        parser.error('--sample must be a fraction in (0, 1]')
+
+    normalizer = None if args.no_normalize else Normalizer(load_aliases(args.aliases))
+
+    def save_variants(variants: Dict[str, str]):
+        if normalizer is not None:
+            save_variant_index(variants, args.variants)
+            print(f"Counted {len(variants)} variant spellings under their canonical words → {args.variants}")
+
+    if args.sample is not None:
+        frequencies, variants = build_frequencies_sample(args.json_dir, args.sample, args.seed, normalizer)
+        save_variants(variants)
+        save_frequencies(frequencies, args.output)
+        print(f"Estimated {len(frequencies)} words → {args.output}")
+        print("\nTop words (scaled frequency):")
+        for word, freq in frequencies.most_common(10):
+            print(f"  {word}: {freq}")
+        return
+
+    if args.approx:
+        counter, variants = build_frequencies_approx(args.json_dir, args.top_k, args.epsilon, args.delta,
+                                                     args.workers, normalizer)
+        save_variants(variants)
+        frequencies = Counter(dict(counter.top()))
+        save_frequencies(frequencies, args.output)
+        print(f"Kept top {len(counter.summary)} of {counter.sketch.total} tokens → {args.output}")
+        print(f"Count-Min error bound: +{counter.sketch.error_bound:.1f} "
+              f"with probability {1 - args.delta:.3f}")
+        print("\nTop words (estimated frequency):")
+        for word, freq in frequencies.most_common(10):
+            print(f"  {word}: {freq}")
+        return
+
+    frequencies, sketches, variants = build_frequencies(args.json_dir, args.precision, args.workers, normalizer)
+    save_variants(variants)
+    save_frequencies(frequencies, args.output)
+    save_sketches(sketches, args.sketches, args.precision)
+
+    print(f"Counted {len(frequencies)} words → {args.output}")
+    print(f"Reach sketches → {args.sketches}")
+    print("\nTop words (frequency / reach):")
+    for word, freq in frequencies.most_common(10):
+        print(f"  {word}: {freq} / {sketches[word].count() if word in sketches else 0}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rebuild comment threads (note -> top-level comments -> replies) and
+aggregate words per thread instead of per comment
+"""
+
+import glob
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from json_codec import decode_records, dump_json
+from normalize_text import Normalizer, load_aliases
+from text_tokens import document_tokens
+
+
+class CommentThreadIndex:
+    """
+    Array-backed comment adjacency in CSR layout.
+
+    Comments and notes are interned to dense integer ids. After finalize(),
+    the top-level comments of note n are
+    note_roots[note_offsets[n]:note_offsets[n + 1]] and the direct replies of
+    comment c are children[child_offsets[c]:child_offsets[c + 1]], so every
+    range lookup is O(1) and no per-node lists are kept.
+    """
+
+    def __init__(self, keep_text: bool = True):
+        self.keep_text = keep_text
+        self.comment_ids: List[str] = []
+        self.note_ids: List[str] = []
+        self.texts: List[str] = []
+        self._comment_index: Dict[str, int] = {}
+        self._note_index: Dict[str, int] = {}
+
+        # Per-comment columns; parents seen before their comment get a
+        # placeholder slot with present == 0
+        self.note_of = array('l')
+        self.parent_of = array('l')
+        self.declared_replies = array('l')
+        self.present = bytearray()
+
+        # CSR adjacency, filled by finalize()
+        self.note_offsets = array('l')
+        self.note_roots = array('l')
+        self.child_offsets = array('l')
+        self.children = array('l')
+        self.finalized = False
+
+    def __len__(self) -> int:
+        return len(self.comment_ids)
+
+    def _intern_comment(self, comment_id: str) -> int:
+        idx = self._comment_index.get(comment_id)
+        if idx is None:
+            idx = len(self.comment_ids)
+            self._comment_index[comment_id] = idx
+            self.comment_ids.append(comment_id)
+            self.note_of.append(-1)
+            self.parent_of.append(-1)
+            self.declared_replies.append(0)
+            self.present.append(0)
+            if self.keep_text:
+                self.texts.append('')
+        return idx
+
+    def _intern_note(self, note_id: str) -> int:
+        idx = self._note_index.get(note_id)
+        if idx is None:
+            idx = len(self.note_ids)
+            self._note_index[note_id] = idx
+            self.note_ids.append(note_id)
+        return idx
+
+    def add_comment(self, record: dict):
+        """Add one raw comment record (duplicates across shards are ignored)."""
+        idx = self._intern_comment(record['comment_id'])
+        if self.present[idx]:
+            return
+        self.present[idx] = 1
+        self.note_of[idx] = self._intern_note(record['note_id'])
+
+        parent_id = record.get('parent_comment_id')
+        if parent_id and parent_id != '0':
+            self.parent_of[idx] = self._intern_comment(str(parent_id))
+
+        try:
+            self.declared_replies[idx] = int(record.get('sub_comment_count') or 0)
+        except (TypeError, ValueError):
+            self.declared_replies[idx] = 0
+
+        if self.keep_text:
+            self.texts[idx] = record.get('content') or ''
+        self.finalized = False
+
+    def is_root(self, idx: int) -> bool:
+        """Top-level comment, or a reply whose parent is missing from the crawl."""
+        parent = self.parent_of[idx]
+        return parent < 0 or not self.present[parent]
+
+    def finalize(self):
+        """Build the CSR arrays with two counting-sort passes over the columns."""
+        n_comments = len(self.comment_ids)
+        n_notes = len(self.note_ids)
+
+        note_counts = array('l', [0]) * (n_notes + 1)
+        child_counts = array('l', [0]) * (n_comments + 1)
+        for idx in range(n_comments):
+            if not self.present[idx]:
+                continue
+            if self.is_root(idx):
+                note_counts[self.note_of[idx] + 1] += 1
+            else:
+                child_counts[self.parent_of[idx] + 1] += 1
+
+        for i in range(n_notes):
+            note_counts[i + 1] += note_counts[i]
+        for i in range(n_comments):
+            child_counts[i + 1] += child_counts[i]
+
+        self.note_offsets = array('l', note_counts)
+        self.child_offsets = array('l', child_counts)
+        self.note_roots = array('l', [0]) * note_counts[n_notes]
+        self.children = array('l', [0]) * child_counts[n_comments]
+
+        # note_counts / child_counts are reused as write cursors
+        for idx in range(n_comments):
+            if not self.present[idx]:
+                continue
+            if self.is_root(idx):
+                note = self.note_of[idx]
+                self.note_roots[note_counts[note]] = idx
+                note_counts[note] += 1
+            else:
+                parent = self.parent_of[idx]
+                self.children[child_counts[parent]] = idx
+                child_counts[parent] += 1
+
+        self.finalized = True
+
+    def root_range(self, note_idx: int) -> Tuple[int, int]:
+        """Slice bounds of the note's top-level comments in note_roots."""
+        return self.note_offsets[note_idx], self.note_offsets[note_idx + 1]
+
+    def child_range(self, comment_idx: int) -> Tuple[int, int]:
+        """Slice bounds of the comment's direct replies in children."""
+        return self.child_offsets[comment_idx], self.child_offsets[comment_idx + 1]
+
+    def roots(self) -> Iterator[int]:
+        """All thread roots, grouped by note."""
+        return iter(self.note_roots)
+
+    def iter_thread(self, root: int) -> Iterator[Tuple[int, int]]:
+        """Yield (comment index, depth) for every comment in a thread, root depth 0."""
+        stack = [(root, 0)]
+        while stack:
+            idx, depth = stack.pop()
+            yield idx, depth
+            start, end = self.child_range(idx)
+            for pos in range(start, end):
+                stack.append((self.children[pos], depth + 1))
+
+
+def load_comment_threads(paths: List[str], keep_text: bool = True) -> CommentThreadIndex:
+    """Load raw comment shards into a finalized thread index."""
+    index = CommentThreadIndex(keep_text=keep_text)
+    for path in paths:
+        for record in decode_records(path, 'comment'):
+            index.add_comment(record)
+    index.finalize()
+    return index
+
+
+def thread_statistics(index: CommentThreadIndex) -> Dict:
+    """Thread size and depth statistics."""
+    sizes = array('l')
+    depths = array('l')
+    depth_histogram: Counter = Counter()
+    for root in index.roots():
+        size = 0
+        max_depth = 0
+        for _, depth in index.iter_thread(root):
+            size += 1
+            max_depth = max(max_depth, depth)
+        sizes.append(size)
+        depths.append(max_depth)
+        depth_histogram[max_depth] += 1
+
+    n_threads = len(sizes)
+    loaded_replies = len(index.children)
+    declared = sum(index.declared_replies[r] for r in index.roots())
+    return {
+        'notes': len(index.note_ids),
+        'comments': sum(index.present),
+        'threads': n_threads,
+        'replies_loaded': loaded_replies,
+        'replies_declared': declared,
+        'max_thread_size': max(sizes) if n_threads else 0,
+        'mean_thread_size': round(sum(sizes) / n_threads, 2) if n_threads else 0,
+        'threads_with_replies': sum(1 for s in sizes if s > 1),
+        'max_depth': max(depths) if n_threads else 0,
+        'depth_histogram': {str(k): v for k, v in sorted(depth_histogram.items())},
+    }
+
+
+def thread_token_frequencies(index: CommentThreadIndex, once_per_thread: bool = True,
+                             normalizer: Optional[Normalizer] = None) -> Counter:
+    """
+    Count tokens over comment threads
+
+    Args:
+        index: Finalized index built with keep_text=True
+        once_per_thread: Count a term at most once per thread, so a word
+            repeated back and forth within one argument counts once
+        normalizer: Fold text and apply aliases as build_frequencies does
+
+    Returns:
+        Counter: token -> frequency
+    """
+    if not index.keep_text:
+        raise ValueError("Thread token counting needs an index built with keep_text=True")
+
+    frequencies: Counter = Counter()
+    for root in index.roots():
+        if once_per_thread:
+            thread_tokens = set()
+            for idx, _ in index.iter_thread(root):
+                thread_tokens.update(document_tokens(index.texts[idx], normalizer))
+            frequencies.update(thread_tokens)
+        else:
+            for idx, _ in index.iter_thread(root):
+                frequencies.update(document_tokens(index.texts[idx], normalizer))
+    return frequencies
+
+
+def main():
+    """Main function"""
+    input_files = sorted(glob.glob('word_frequency/json/search_comments_*.json'))
+    output_file = 'word_frequency/xhs_comment_thread_frequencies.json'
+
+    index = load_comment_threads(input_files)
+    stats = thread_statistics(index)
+    print(f"Loaded {stats['comments']} comments from {len(input_files)} files")
+    for key, value in stats.items():
+        print(f"  {key}: {value}")
+
+    frequencies = thread_token_frequencies(index, once_per_thread=True, normalizer=Normalizer(load_aliases()))
+    output = [{'zh': word, 'frequency': freq} for word, freq in frequencies.most_common()]
+    dump_json(output, output_file)
+
+    print(f"Thread-level frequencies saved to: {output_file}")
+    print("\nTop thread-level words:")
+    for word in output[:10]:
+        print(f"  {word['zh']}: {word['frequency']}")
+
+
+if __name__ == '__main__':
+    main()
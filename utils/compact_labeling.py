@@ -5,8 +5,11 @@ Compact labeling for words with fewer, business-focused categories.
 Adds 'not_important' when a word is likely unrelated to SFF operations.
 """
 
-import json
-from typing import List
+import os
+from typing import Dict, List, Optional
+
+from hyperloglog import load_sketches, merge_all
+from word_records import WordRecord, load_word_records, save_word_records
 
 # Core compact categories
 COMPACT_CATEGORIES = {
@@ -94,32 +97,28 @@ def get_compact_labels(zh: str, en: str) -> List[str]:
     return sorted(list(set(labels)))
 
 
-def relabel_compact(input_file: str, output_file: str, min_frequency: int = 1):
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+def relabel_compact(input_file: str, output_file: str, min_frequency: int = 1,
+                    sketch_file: Optional[str] = None):
+    data = load_word_records(input_file)
+
+    # Optional distinct-user reach sketches from build_frequencies
+    sketches = load_sketches(sketch_file) if sketch_file else None
 
     out = []
-    for item in data:
-        if item.get('frequency', 0) < min_frequency:
+    for word in data:
+        if word.frequency < min_frequency:
             continue
-        zh = item.get('zh', '')
-        en = item.get('en', '')
-        freq = item.get('frequency', 0)
-        labels = get_compact_labels(zh, en)
-        out.append({
-            'zh': zh,
-            'en': en,
-            'frequency': freq,
-            'labels': labels,
-        })
-
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+        word.set_labels(get_compact_labels(word.zh, word.en))
+        if sketches is not None:
+            word.reach = sketches[word.zh].count() if word.zh in sketches else 0
+        out.append(word)
+
+    save_word_records(out, output_file)
 
     # Print summary
     label_counts = {}
     for w in out:
-        for l in w['labels']:
+        for l in w.labels:
             if l in CONTEXT_NOISE:
                 continue
             label_counts[l] = label_counts.get(l, 0) + 1
@@ -129,9 +128,30 @@ def relabel_compact(input_file: str, output_file: str, min_frequency: int = 1):
     for k, v in sorted(label_counts.items(), key=lambda x: x[1], reverse=True):
         print(f"  {k}: {v}")
 
+    if sketches is not None:
+        print("Label reach (distinct users, approx.):")
+        for k, v in sorted(label_reach(out, sketches).items(), key=lambda x: x[1], reverse=True):
+            print(f"  {k}: {v}")
+
+
+def label_reach(words: List[WordRecord], sketches: Dict) -> Dict[str, int]:
+    """Approximate distinct users per label, merging the sketches of its words."""
+    by_label: Dict[str, list] = {}
+    for w in words:
+        sketch = sketches.get(w.zh)
+        if sketch is None:
+            continue
+        for l in w.labels:
+            if l not in CONTEXT_NOISE:
+                by_label.setdefault(l, []).append(sketch)
+    return {l: merge_all(group).count() for l, group in by_label.items()}
+
 
 if __name__ == '__main__':
     # Input: translated words with frequency
     INPUT = 'word_frequency/xhs_all_content_wordcloud_frequencies_translated.json'
     OUTPUT = 'word_frequency/xhs_all_content_wordcloud_frequencies_compact_labeled.json'
-    relabel_compact(INPUT, OUTPUT, min_frequency=1)
+    # Reach sketches written by build_frequencies (skipped if not built yet)
+    SKETCHES = 'word_frequency/xhs_all_content_reach_sketches.json'
+    relabel_compact(INPUT, OUTPUT, min_frequency=1,
+                    sketch_file=SKETCHES if os.path.exists(SKETCHES) else None)
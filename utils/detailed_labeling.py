@@ -4,10 +4,11 @@
 Detailed labeling for words with frequency >= 10
 """
 
-import json
 import re
 from typing import List, Dict
 
+from word_records import load_word_records, save_word_records
+
 def get_detailed_labels(word: str, english: str) -> List[str]:
     """
     Get detailed labels for a word with comprehensive categorization
@@ -257,42 +258,26 @@ def process_words_with_detailed_labels(input_file: str, output_file: str, min_fr
     """
     Process words with detailed labeling
     """
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_word_records(input_file)
     
     # Filter words with frequency >= min_frequency
-    filtered_data = [word for word in data if word['frequency'] >= min_frequency]
+    labeled_data = [word for word in data if word.frequency >= min_frequency]
     
-    print(f"Processing {len(filtered_data)} words with frequency >= {min_frequency}")
+    print(f"Processing {len(labeled_data)} words with frequency >= {min_frequency}")
     
-    # Add detailed labels
-    labeled_data = []
-    for word_obj in filtered_data:
-        word = word_obj['zh']
-        english = word_obj['en']
-        frequency = word_obj['frequency']
-        
-        labels = get_detailed_labels(word, english)
-        
-        labeled_obj = {
-            'zh': word,
-            'en': english,
-            'frequency': frequency,
-            'labels': labels
-        }
-        
-        labeled_data.append(labeled_obj)
+    # Add detailed labels in place
+    for word_obj in labeled_data:
+        word_obj.set_labels(get_detailed_labels(word_obj.zh, word_obj.en))
     
     # Save results
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(labeled_data, f, ensure_ascii=False, indent=2)
+    save_word_records(labeled_data, output_file)
     
     print(f"Detailed labeled data saved to: {output_file}")
     
     # Analyze label distribution
     label_counts = {}
     for word_obj in labeled_data:
-        for label in word_obj['labels']:
+        for label in word_obj.labels:
             label_counts[label] = label_counts.get(label, 0) + 1
     
     print(f"\nLabel distribution ({len(label_counts)} unique labels):")
@@ -302,7 +287,7 @@ def process_words_with_detailed_labels(input_file: str, output_file: str, min_fr
     # Show examples
     print(f"\nExample detailed labels:")
     for i, word_obj in enumerate(labeled_data[:10]):
-        print(f"  {word_obj['zh']} ({word_obj['frequency']}) -> {word_obj['labels']}")
+        print(f"  {word_obj.zh} ({word_obj.frequency}) -> {list(word_obj.labels)}")
 
 if __name__ == "__main__":
     input_file = "word_frequency/xhs_all_content_wordcloud_frequencies_translated.json"
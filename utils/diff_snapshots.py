@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diff two labeled snapshots (e.g. two crawl dates): new and dropped words,
+risers and fallers, label and country share changes
+"""
+
+import argparse
+import heapq
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from compact_labeling import CONTEXT_NOISE
+from json_codec import dump_json
+from process_countries import country_of
+from word_records import WordRecord, load_word_records
+
+TOP_N = 50
+
+# (zh, en, frequency, labels) after folding duplicate keys
+Entry = Tuple[str, str, int, Tuple[str, ...]]
+
+
+def _grouped(records: List[WordRecord]) -> Iterator[Entry]:
+    """Walk records sorted by zh, summing frequencies of repeated keys."""
+    current: Optional[list] = None
+    for w in records:
+        if current is not None and current[0] == w.zh:
+            current[2] += w.frequency
+            continue
+        if current is not None:
+            yield tuple(current)
+        current = [w.zh, w.en, w.frequency, w.labels]
+    if current is not None:
+        yield tuple(current)
+
+
+def merge_join(old: List[WordRecord], new: List[WordRecord]) -> Iterator[Tuple[Optional[Entry], Optional[Entry]]]:
+    """Sort both snapshots by word in place and yield aligned (old, new) pairs."""
+    old.sort(key=lambda w: w.zh)
+    new.sort(key=lambda w: w.zh)
+    old_iter, new_iter = _grouped(old), _grouped(new)
+    a, b = next(old_iter, None), next(new_iter, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            yield a, None
+            a = next(old_iter, None)
+        elif a is None or b[0] < a[0]:
+            yield None, b
+            b = next(new_iter, None)
+        else:
+            yield a, b
+            a, b = next(old_iter, None), next(new_iter, None)
+
+
+class _TopN:
+    """Bounded min-heap keeping the n largest items by key."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.heap: list = []
+        self.counter = 0
+
+    def push(self, key: float, item: dict):
+        self.counter += 1
+        entry = (key, self.counter, item)
+        if len(self.heap) < self.n:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def items(self) -> List[dict]:
+        return [item for _, _, item in sorted(self.heap, reverse=True)]
+
+
+def _shares(old: Dict[str, int], new: Dict[str, int], old_total: int, new_total: int) -> List[dict]:
+    rows = []
+    for key in set(old) | set(new):
+        old_share = old.get(key, 0) / old_total * 100 if old_total else 0
+        new_share = new.get(key, 0) / new_total * 100 if new_total else 0
+        rows.append({
+            'name': key,
+            'old_frequency': old.get(key, 0),
+            'new_frequency': new.get(key, 0),
+            'old_share': round(old_share, 2),
+            'new_share': round(new_share, 2),
+            'share_change': round(new_share - old_share, 2),
+        })
+    rows.sort(key=lambda r: abs(r['share_change']), reverse=True)
+    return rows
+
+
+def diff_snapshots(old: List[WordRecord], new: List[WordRecord], top_n: int = TOP_N) -> dict:
+    """One linear merge pass; extra memory is the top-n heaps and per-label/country totals."""
+    old_total = sum(w.frequency for w in old)
+    new_total = sum(w.frequency for w in new)
+    # Risers and fallers are ranked on counts normalised to the old corpus size,
+    # so a bigger crawl does not make every word a riser
+    scale = old_total / new_total if new_total else 0
+
+    added, dropped, risers, fallers = _TopN(top_n), _TopN(top_n), _TopN(top_n), _TopN(top_n)
+    label_old: Dict[str, int] = {}
+    label_new: Dict[str, int] = {}
+    country_old: Dict[str, int] = {}
+    country_new: Dict[str, int] = {}
+    counts = {'common': 0, 'added': 0, 'dropped': 0}
+
+    def account(entry: Entry, labels: Dict[str, int], countries: Dict[str, int]):
+        zh, en, freq, word_labels = entry
+        for l in word_labels:
+            if l not in CONTEXT_NOISE:
+                labels[l] = labels.get(l, 0) + freq
+        country = country_of(en, word_labels)
+        if country:
+            countries[country] = countries.get(country, 0) + freq
+
+    for a, b in merge_join(old, new):
+        if a is not None:
+            account(a, label_old, country_old)
+        if b is not None:
+            account(b, label_new, country_new)
+
+        if a is None:
+            counts['added'] += 1
+            added.push(b[2], {'zh': b[0], 'en': b[1], 'frequency': b[2], 'labels': list(b[3])})
+        elif b is None:
+            counts['dropped'] += 1
+            dropped.push(a[2], {'zh': a[0], 'en': a[1], 'frequency': a[2], 'labels': list(a[3])})
+        else:
+            counts['common'] += 1
+            # Change in old-crawl units: a word that merely kept its share scores 0
+            change = round(b[2] * scale - a[2], 6)  # drop float noise from the scaling
+            item = {
+                'zh': b[0], 'en': b[1] or a[1],
+                'old_frequency': a[2], 'new_frequency': b[2],
+                'delta': b[2] - a[2],
+                'normalized_delta': round(change, 2),
+                'ratio': round(b[2] / a[2], 3) if a[2] else None,
+                'share_ratio': round(b[2] * scale / a[2], 3) if a[2] else None,
+                'labels': list(b[3]),
+            }
+            if change > 0:
+                risers.push(change, item)
+            elif change < 0:
+                fallers.push(-change, item)
+
+    return {
+        'old_total': old_total,
+        'new_total': new_total,
+        'words': counts,
+        'new_words': added.items(),
+        'dropped_words': dropped.items(),
+        'risers': risers.items(),
+        'fallers': fallers.items(),
+        'labels': _shares(label_old, label_new, old_total, new_total),
+        'countries': _shares(country_old, country_new, sum(country_old.values()), sum(country_new.values())),
+    }
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Diff two labeled snapshots')
+    parser.add_argument('old', help='earlier labeled.json snapshot')
+    parser.add_argument('new', help='later labeled.json snapshot')
+    parser.add_argument('--output', default='public/data/snapshot_diff.json')
+    parser.add_argument('--top', type=int, default=TOP_N)
+    args = parser.parse_args()
+
+    result = diff_snapshots(load_word_records(args.old), load_word_records(args.new), args.top)
+    result['old_snapshot'] = args.old
+    result['new_snapshot'] = args.new
+    dump_json(result, args.output, pretty=False)
+
+    words = result['words']
+    print(f"{words['common']} common, {words['added']} new, {words['dropped']} dropped words → {args.output}")
+    for r in result['risers'][:5]:
+        print(f"  ↑ {r['zh']} ({r['en']}): {r['old_frequency']} → {r['new_frequency']}")
+    for r in result['fallers'][:5]:
+        print(f"  ↓ {r['zh']} ({r['en']}): {r['old_frequency']} → {r['new_frequency']}")
+
+
+if __name__ == '__main__':
+    main()
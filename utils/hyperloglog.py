@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mergeable HyperLogLog sketches for approximate distinct-user counts
+"""
+
+import base64
+import hashlib
+import math
+from typing import Dict, Iterable, Optional
+
+from json_codec import dump_json, load_json
+
+DEFAULT_PRECISION = 10  # 1024 registers, ~3.3% standard error
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch with a sparse start.
+
+    Registers are kept in a small dict while few of them are set (most words
+    are used by a handful of people) and switch to a dense bytearray of
+    2**precision bytes once the dict would cost about as much, so memory per
+    sketch stays bounded by the dense size whatever the audience.
+    """
+
+    __slots__ = ('precision', 'sparse', 'registers')
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError(f"HyperLogLog precision must be in [4, 16], got {precision}")
+        self.precision = precision
+        self.sparse: Optional[Dict[int, int]] = {}
+        self.registers: Optional[bytearray] = None
+
+    @property
+    def size(self) -> int:
+        return 1 << self.precision
+
+    def _set(self, index: int, rank: int):
+        if self.registers is not None:
+            if rank > self.registers[index]:
+                self.registers[index] = rank
+            return
+        if rank > self.sparse.get(index, 0):
+            self.sparse[index] = rank
+            if len(self.sparse) > self.size // 64:
+                self._densify()
+
+    def _densify(self):
+        registers = bytearray(self.size)
+        for index, rank in self.sparse.items():
+            registers[index] = rank
+        self.registers = registers
+        self.sparse = None
+
+    def add(self, value: str):
+        """Add one item (e.g. a user id)."""
+        h = _hash64(value)
+        tail_bits = 64 - self.precision
+        index = h >> tail_bits
+        tail = h & ((1 << tail_bits) - 1)
+        self._set(index, tail_bits - tail.bit_length() + 1)
+
+    def update(self, values: Iterable[str]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'HyperLogLog'):
+        """Merge another sketch into this one (register-wise max)."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        if other.registers is None:
+            for index, rank in other.sparse.items():
+                self._set(index, rank)
+            return
+        if self.registers is None:
+            self._densify()
+        registers = self.registers
+        for index, rank in enumerate(other.registers):
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def count(self) -> int:
+        """Estimated number of distinct items."""
+        m = self.size
+        if self.registers is None:
+            zeros = m - len(self.sparse)
+            harmonic = zeros + sum(2.0 ** -rank for rank in self.sparse.values())
+        else:
+            zeros = self.registers.count(0)
+            harmonic = sum(2.0 ** -rank for rank in self.registers)
+
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimate = alpha * m * m / harmonic
+
+        # Small-range correction (linear counting)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def encode(self) -> str:
+        """Compact text form: 's:' + packed (index, rank) pairs or 'd:' + registers."""
+        if self.registers is not None:
+            return 'd:' + base64.b64encode(bytes(self.registers)).decode('ascii')
+        packed = bytearray()
+        for index, rank in sorted(self.sparse.items()):
+            packed += index.to_bytes(2, 'big')
+            packed.append(rank)
+        return 's:' + base64.b64encode(bytes(packed)).decode('ascii')
+
+    @classmethod
+    def decode(cls, text: str, precision: int = DEFAULT_PRECISION) -> 'HyperLogLog':
+        sketch = cls(precision)
+        kind, payload = text.split(':', 1)
+        raw = base64.b64decode(payload)
+        if kind == 'd':
+            if len(raw) != sketch.size:
+                raise ValueError("Dense HyperLogLog payload does not match precision")
+            sketch.registers = bytearray(raw)
+            sketch.sparse = None
+        else:
+            for pos in range(0, len(raw), 3):
+                sketch._set(int.from_bytes(raw[pos:pos + 2], 'big'), raw[pos + 2])
+        return sketch
+
+
+def merge_all(sketches: Iterable[HyperLogLog], precision: int = DEFAULT_PRECISION) -> HyperLogLog:
+    """Union of several sketches (an empty union counts 0)."""
+    merged = None
+    for sketch in sketches:
+        if merged is None:
+            merged = HyperLogLog(sketch.precision)
+        merged.merge(sketch)
+    return merged if merged is not None else HyperLogLog(precision)
+
+
+def save_sketches(sketches: Dict[str, HyperLogLog], file_path: str, precision: int = DEFAULT_PRECISION):
+    """Save a word -> sketch map so later stages (labels, countries) can merge them."""
+    payload = {
+        'precision': precision,
+        'sketches': {key: sketch.encode() for key, sketch in sketches.items()},
+    }
+    dump_json(payload, file_path, pretty=False)
+
+
+def load_sketches(file_path: str) -> Dict[str, HyperLogLog]:
+    """Load a word -> sketch map written by save_sketches."""
+    payload = load_json(file_path)
+    precision = payload.get('precision', DEFAULT_PRECISION)
+    return {key: HyperLogLog.decode(text, precision) for key, text in payload['sketches'].items()}
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared JSON codec: orjson or msgspec when installed, stdlib json otherwise,
+plus schema checks for the record kinds the pipeline reads
+"""
+
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    BACKEND = 'orjson'
+elif msgspec is not None:
+    BACKEND = 'msgspec'
+else:
+    BACKEND = 'json'
+
+
+def loads(data) -> Any:
+    """Decode JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, pretty: bool = False, default: Optional[Callable] = None) -> bytes:
+    """
+    Encode to UTF-8 JSON bytes. pretty=True matches
+    json.dump(obj, ensure_ascii=False, indent=2); otherwise output is compact.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if msgspec is not None:
+        encoded = msgspec.json.encode(obj, enc_hook=default)
+        return msgspec.json.format(encoded, indent=2) if pretty else encoded
+    if pretty:
+        text = json.dumps(obj, ensure_ascii=False, indent=2, default=default)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=default)
+    return text.encode('utf-8')
+
+
+def load_json(file_path: str) -> Any:
+    """Read and decode a JSON file."""
+    with open(file_path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_json(obj: Any, file_path: str, pretty: bool = True, default: Optional[Callable] = None,
+              atomic: bool = False):
+    """
+    Encode and write a JSON file (pretty by default, like the existing outputs).
+    With atomic=True readers see either the old or the new file, never a partial one.
+    """
+    data = dumps(obj, pretty=pretty, default=default)
+    if atomic:
+        atomic_write(file_path, data)
+        return
+    with open(file_path, 'wb') as f:
+        f.write(data)
+
+
+def atomic_write(file_path: str, data: bytes):
+    """Write to a temp file in the same directory, then rename it over the target."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(file_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+# Record schemas: field -> (accepted types, required)
+OPTIONAL_STR = (str, type(None))
+COUNT = (str, int)  # the crawler writes counts as strings, e.g. "71"
+
+SCHEMAS: Dict[str, Dict[str, Tuple[tuple, bool]]] = {
+    'note': {
+        'note_id': ((str,), True),
+        'title': (OPTIONAL_STR, False),
+        'desc': (OPTIONAL_STR, False),
+        'user_id': (OPTIONAL_STR, False),
+        'time': ((int,), False),
+        'liked_count': (COUNT, False),
+        'collected_count': (COUNT, False),
+        'comment_count': (COUNT, False),
+        'share_count': (COUNT, False),
+        'ip_location': (OPTIONAL_STR, False),
+        'tag_list': (OPTIONAL_STR, False),
+    },
+    'comment': {
+        'comment_id': ((str,), True),
+        'note_id': ((str,), True),
+        'content': (OPTIONAL_STR, True),
+        'user_id': (OPTIONAL_STR, False),
+        'create_time': ((int,), False),
+        'parent_comment_id': ((str, int), False),
+        'sub_comment_count': (COUNT, False),
+        'like_count': (COUNT, False),
+        'ip_location': (OPTIONAL_STR, False),
+    },
+    'labeled_word': {
+        'zh': ((str,), True),
+        'en': ((str,), True),
+        'frequency': ((int,), True),
+        'reach': ((int,), False),
+        'labels': ((list,), False),
+    },
+    # Untranslated builder output ({zh, frequency})
+    'word_frequency': {
+        'zh': ((str,), True),
+        'frequency': ((int,), True),
+    },
+}
+
+MAX_REPORTED_ERRORS = 10
+_MISSING = object()
+
+
+class RecordValidationError(ValueError):
+    """Raised in strict mode when a file contains records that fail their schema."""
+
+    def __init__(self, report: str, errors: List[str]):
+        super().__init__(report)
+        self.errors = errors
+
+
+def check_record(record: Any, schema: Dict[str, Tuple[tuple, bool]]) -> Optional[str]:
+    """Return a description of the first schema violation, or None if the record is valid."""
+    if not isinstance(record, dict):
+        return f"expected an object, got {type(record).__name__}"
+    for field, (types, required) in schema.items():
+        value = record.get(field, _MISSING)
+        # Exact type first: the common case, and it never lets a bool through
+        if value.__class__ in types:
+            continue
+        if value is _MISSING:
+            if required:
+                return f"missing '{field}'"
+            continue
+        # bool is an int subclass but never a valid count or frequency
+        if isinstance(value, bool) or not isinstance(value, types):
+            expected = '/'.join('null' if t is type(None) else t.__name__ for t in types)
+            return f"'{field}' expected {expected}, got {type(value).__name__}"
+    if 'labels' in schema:
+        for label in record.get('labels', ()):
+            if label.__class__ is not str and not isinstance(label, str):
+                return "'labels' must be a list of strings"
+    return None
+
+
+def validate_records(records: Any, kind: str, source: str = '<data>') -> Tuple[List[dict], List[str]]:
+    """Split records into valid rows and error lines ('row N: reason')."""
+    if not isinstance(records, list):
+        raise RecordValidationError(f"{source}: expected a JSON array of {kind} records", [])
+    schema = SCHEMAS[kind]
+    valid = []
+    errors = []
+    for row, record in enumerate(records):
+        problem = check_record(record, schema)
+        if problem is None:
+            valid.append(record)
+        else:
+            errors.append(f"row {row}: {problem}")
+    return valid, errors
+
+
+def format_report(source: str, kind: str, total: int, errors: List[str]) -> str:
+    lines = [f"{source}: rejected {len(errors)} of {total} {kind} records"]
+    lines.extend(f"  {e}" for e in errors[:MAX_REPORTED_ERRORS])
+    if len(errors) > MAX_REPORTED_ERRORS:
+        lines.append(f"  ... and {len(errors) - MAX_REPORTED_ERRORS} more")
+    return '\n'.join(lines)
+
+
+def decode_records(file_path: str, kind: str, strict: bool = False) -> List[dict]:
+    """
+    Load a JSON array and check every record against SCHEMAS[kind] up front
+
+    Args:
+        file_path (str): JSON file holding an array of records
+        kind (str): 'note', 'comment', 'labeled_word' or 'word_frequency'
+        strict (bool): Raise RecordValidationError instead of dropping bad rows
+
+    Returns:
+        List[dict]: Records that passed validation
+    """
+    records = load_json(file_path)
+    valid, errors = validate_records(records, kind, file_path)
+    if errors:
+        report = format_report(file_path, kind, len(records), errors)
+        if strict:
+            raise RecordValidationError(report, errors)
+        print(report)
+    return valid
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Aho-Corasick keyword automaton: find many bilingual keywords in one pass
+over the text
+"""
+
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+Match = Tuple[int, int, Any]  # (start, end, value)
+
+
+def _is_ascii_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+class KeywordAutomaton:
+    """
+    Case-insensitive multi-keyword matcher.
+
+    Build once with add() + build(), then scan any number of texts in time
+    linear in the text length. ASCII keywords only match on word boundaries
+    ('rump' does not fire inside 'trump'); CJK keywords match anywhere.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # node -> [(keyword length, value, needs word boundary)]
+        self._out: List[List[Tuple[int, Any, bool]]] = [[]]
+        self._built = False
+
+    def add(self, keyword: str, value: Any):
+        keyword = keyword.lower()
+        if not keyword:
+            return
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(keyword), value, keyword.isascii()))
+        self._built = False
+
+    def build(self):
+        """Compute failure links (BFS) and fold suffix outputs into each node."""
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+
+    def find_all(self, text: str) -> List[Match]:
+        """Every (possibly overlapping) keyword occurrence."""
+        if not self._built:
+            self.build()
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Rare case-folding length change; fall back to the original text
+            lowered = text
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        matches: List[Match] = []
+        node = 0
+        for end, ch in enumerate(lowered, 1):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value, bounded in out[node]:
+                start = end - length
+                if bounded and (
+                    (start > 0 and _is_ascii_word_char(lowered[start - 1]))
+                    or (end < len(lowered) and _is_ascii_word_char(lowered[end]))
+                ):
+                    continue
+                matches.append((start, end, value))
+        return matches
+
+    def find(self, text: str) -> List[Match]:
+        """Leftmost-longest, non-overlapping occurrences ('eye fillet roast' beats 'eye fillet')."""
+        selected: List[Match] = []
+        last_end = 0
+        for start, end, value in sorted(self.find_all(text), key=lambda m: (m[0], m[0] - m[1])):
+            if start >= last_end:
+                selected.append((start, end, value))
+                last_end = end
+        return selected
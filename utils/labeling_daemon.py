@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resident labeling worker: watches word_frequency/json/ for new or grown
+crawl files, counts only those, relabels with the in-memory rules and
+atomically republishes public/data/labeled.json and country_analysis.json.
+
+Rule modules (compact_labeling, process_countries, normalize_text) and the
+alias file are reloaded when they change on disk, so a rule edit shows up
+on the dashboard without restarting. Words carry distinct-user reach like
+the full pipeline, merged from per-file HyperLogLog sketches.
+"""
+
+import argparse
+import glob
+import importlib.util
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from build_frequencies import SHARD_DATE, count_shard
+from hyperloglog import HyperLogLog, merge_all
+from json_codec import dump_json
+from word_records import WordRecord, load_word_records
+
+# Loaded in this order: later modules import names from earlier ones
+RULE_MODULES = ('normalize_text', 'compact_labeling', 'process_countries')
+
+FileSignature = Tuple[int, int]  # (size, mtime_ns)
+
+
+class RuleSet:
+    """Labeling rules, country mapping and aliases, with mtime-based hot reload."""
+
+    def __init__(self, alias_file: str):
+        self.alias_file = alias_file
+        self.paths = {name: importlib.util.find_spec(name).origin for name in RULE_MODULES}
+        self._mtimes = self._current_mtimes()
+        self._swap(*self._load())
+
+    def _load(self):
+        """
+        Execute fresh copies of all rule modules and build the rules from
+        them. Nothing the daemon uses is touched until everything succeeded;
+        on an error sys.modules is put back as it was.
+        """
+        previous = {name: sys.modules.get(name) for name in RULE_MODULES}
+        try:
+            modules = {}
+            for name in RULE_MODULES:
+                spec = importlib.util.spec_from_file_location(name, self.paths[name])
+                module = importlib.util.module_from_spec(spec)
+                # Registered before executing so later rule modules import from this copy
+                sys.modules[name] = module
+                spec.loader.exec_module(module)
+                modules[name] = module
+            normalize_text = modules['normalize_text']
+            normalizer = normalize_text.Normalizer(normalize_text.load_aliases(self.alias_file))
+        except BaseException:
+            for name, module in previous.items():
+                if module is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = module
+            raise
+        return modules, normalizer
+
+    def _swap(self, modules: Dict, normalizer):
+        self.modules = modules
+        self.normalizer = normalizer
+        self.country_of = modules['process_countries'].country_of
+        self._labels: Dict[Tuple[str, str], List[str]] = {}
+
+    def _current_mtimes(self) -> Dict[str, Optional[int]]:
+        mtimes = {}
+        for path in list(self.paths.values()) + [self.alias_file]:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def reload_if_changed(self) -> Set[str]:
+        """
+        Reload every rule module if any rule file changed; keep the old rules
+        on errors. Returns the changed paths (empty if nothing was reloaded).
+        """
+        mtimes = self._current_mtimes()
+        if mtimes == self._mtimes:
+            return set()
+        changed = {path for path, mtime in mtimes.items() if self._mtimes.get(path) != mtime}
+        # Remember the attempt either way, so a half-saved file is retried on its next save
+        self._mtimes = mtimes
+        try:
+            loaded = self._load()
+        except Exception as e:
+            print(f"Rule reload failed, keeping previous rules: {e!r}")
+            return set()
+        self._swap(*loaded)
+        print(f"Reloaded labeling rules ({', '.join(sorted(os.path.basename(p) for p in changed))})")
+        return changed
+
+    def changes_counts(self, paths: Set[str]) -> bool:
+        """Counts are of normalized tokens: only the normalization code and aliases change them."""
+        return bool(paths & {self.paths['normalize_text'], self.alias_file})
+
+    def labels(self, zh: str, en: str) -> List[str]:
+        key = (zh, en)
+        labels = self._labels.get(key)
+        if labels is None:
+            labels = self._labels[key] = self.modules['compact_labeling'].get_compact_labels(zh, en)
+        return labels
+
+
+class LabelingDaemon:
+    """
+    Token counts and reach sketches per input file, so a rewritten file
+    replaces its old contribution
+    """
+
+    def __init__(self, json_dir: str, output_dir: str, rules: RuleSet,
+                 vocabulary_file: Optional[str] = None):
+        self.json_dir = json_dir
+        self.output_dir = output_dir
+        self.rules = rules
+        self.totals: Counter = Counter()
+        self.file_counts: Dict[str, Counter] = {}
+        self.file_sketches: Dict[str, Dict[str, HyperLogLog]] = {}
+        # Reach sketches merged over all files, dropped per word when a file containing it changes
+        self.sketches: Dict[str, HyperLogLog] = {}
+        self.processed: Dict[str, FileSignature] = {}
+        self.pending: Dict[str, FileSignature] = {}
+
+        # English names come from the last full (translated) run; new words stay untranslated
+        self.translations: Dict[str, str] = {}
+        if vocabulary_file and os.path.exists(vocabulary_file):
+            self.translations = {w.zh: w.en for w in load_word_records(vocabulary_file)}
+
+    def _signatures(self) -> Dict[str, FileSignature]:
+        signatures = {}
+        for path in glob.glob(os.path.join(self.json_dir, 'search_*_*.json')):
+            if SHARD_DATE.search(os.path.basename(path)):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    # Deleted or renamed since the glob; gone files are dropped by scan()
+                    continue
+                signatures[path] = (st.st_size, st.st_mtime_ns)
+        return signatures
+
+    def count_file(self, path: str) -> Tuple[Counter, Dict[str, HyperLogLog]]:
+        if '_contents_' in os.path.basename(path):
+            shard = (None, path, None)
+        else:
+            shard = (None, None, path)
+        counts, sketches, _ = count_shard(shard, normalizer=self.rules.normalizer)
+        return counts, sketches
+
+    def _replace(self, path: str, counts: Counter, sketches: Dict[str, HyperLogLog]):
+        old = self.file_counts.pop(path, None)
+        if old:
+            self.totals.subtract(old)
+        for word in self.file_sketches.pop(path, {}):
+            self.sketches.pop(word, None)
+        if counts:
+            self.totals.update(counts)
+            self.file_counts[path] = counts
+        if sketches:
+            self.file_sketches[path] = sketches
+            for word in sketches:
+                self.sketches.pop(word, None)
+        self.totals = +self.totals
+
+    def reach_sketch(self, word: str) -> HyperLogLog:
+        sketch = self.sketches.get(word)
+        if sketch is None:
+            sketch = self.sketches[word] = merge_all(
+                sketches[word] for sketches in self.file_sketches.values() if word in sketches)
+        return sketch
+
+    def scan(self, settle: bool = True) -> bool:
+        """
+        Count new or changed files whose size and mtime were unchanged
+        since the previous poll (the crawler has finished writing them).
+        With settle=False every file is taken as is (startup).
+        """
+        changed = False
+        signatures = self._signatures()
+        for path in list(self.file_counts):
+            if path not in signatures:
+                self._replace(path, Counter(), {})
+                self.processed.pop(path, None)
+                print(f"Removed {os.path.basename(path)}")
+                changed = True
+
+        for path, signature in sorted(signatures.items()):
+            if self.processed.get(path) == signature:
+                continue
+            if settle and self.pending.get(path) != signature:
+                self.pending[path] = signature
+                continue
+            self.pending.pop(path, None)
+            self.processed[path] = signature
+            start = time.perf_counter()
+            try:
+                counts, sketches = self.count_file(path)
+            except (OSError, ValueError) as e:
+                # Vanished, unreadable, invalid JSON or schema: keep the previous
+                # counts until the file changes again (or is dropped once it is gone)
+                print(f"Skipping {os.path.basename(path)}: {e}")
+                continue
+            self._replace(path, counts, sketches)
+            print(f"Counted {os.path.basename(path)}: {sum(counts.values())} tokens "
+                  f"in {time.perf_counter() - start:.2f}s")
+            changed = True
+        return changed
+
+    def recount(self):
+        """Count every file again, e.g. after the normalization rules changed."""
+        self.processed.clear()
+        self.scan(settle=False)
+
+    def build_records(self) -> List[WordRecord]:
+        translations = {}
+        for zh, en in self.translations.items():
+            translations.setdefault(self.rules.normalizer(zh), en)
+
+        records = []
+        for zh, frequency in self.totals.most_common():
+            en = translations.get(zh, '')
+            records.append(WordRecord(zh, en, frequency, self.rules.labels(zh, en),
+                                      self.reach_sketch(zh).count()))
+        return records
+
+    def publish(self):
+        """Rebuild both dashboard files from the in-memory state and swap them in atomically."""
+        start = time.perf_counter()
+        records = self.build_records()
+        dump_json(records, os.path.join(self.output_dir, 'labeled.json'),
+                  default=WordRecord.to_dict, atomic=True)
+
+        process_countries = self.rules.modules['process_countries']
+        country_data = [r.to_dict() for r in records if self.rules.country_of(r.en, r.labels)]
+        frequencies, country_words, reach = process_countries.process_country_frequencies(
+            country_data, self.rules.country_of.mapping, self.sketches)
+        result = process_countries.create_output(frequencies, country_words, reach)
+        dump_json(result, os.path.join(self.output_dir, 'country_analysis.json'), atomic=True)
+
+        print(f"Published {len(records)} words, {result['unique_countries']} countries "
+              f"in {time.perf_counter() - start:.2f}s")
+
+    def run(self, interval: float = 2.0, once: bool = False):
+        self.scan(settle=False)
+        self.publish()
+        if once:
+            return
+        print(f"Watching {self.json_dir} every {interval}s (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(interval)
+                changed = self.rules.reload_if_changed()
+                if changed and self.rules.changes_counts(changed):
+                    self.recount()
+                    self.publish()
+                elif changed:
+                    # Label or country rules only: relabel the current counts
+                    self.scan()
+                    self.publish()
+                elif self.scan():
+                    self.publish()
+        except KeyboardInterrupt:
+            print("Stopped")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Watch crawl files and republish labeled data')
+    parser.add_argument('--json-dir', default='word_frequency/json')
+    parser.add_argument('--output-dir', default='public/data')
+    parser.add_argument('--vocabulary',
+                        default='word_frequency/xhs_all_content_wordcloud_frequencies_compact_labeled.json',
+                        help='translated words from the last full run, for English names')
+    parser.add_argument('--aliases', default='word_frequency/aliases.json')
+    parser.add_argument('--interval', type=float, default=2.0, help='polling interval in seconds')
+    parser.add_argument('--once', action='store_true', help='process current files, publish and exit')
+    args = parser.parse_args()
+
+    daemon = LabelingDaemon(args.json_dir, args.output_dir, RuleSet(args.aliases), args.vocabulary)
+    daemon.run(args.interval, args.once)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Text normalization before counting: width (NFKC), traditional ->
+simplified Chinese and case folding of the raw text before it is
+tokenized, then an alias map on the tokens, so variants such as 說/说,
+Ｃｏｌｅｓ/Coles/coles/colse collapse into one vocabulary entry
+"""
+
+import os
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from json_codec import load_json
+
+# OpenCC's traditional -> simplified character map (Apache-2.0, vendored)
+TS_CHARACTERS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'opencc', 'TSCharacters.txt')
+# Valid simplified characters that OpenCC still converts: 著 (显著, 著名).
+# Entries listing themselves among their simplified forms (乾 -> 干 乾,
+# 於, 覆, 瞭 ...) are skipped when the map is loaded.
+NOT_TRADITIONAL_ONLY = {'著', '乾'}
+
+
+def load_traditional_map(file_path: str = TS_CHARACTERS) -> Dict[str, str]:
+    """
+    Traditional -> simplified for characters that only occur in traditional
+    text, so folding never changes a valid simplified word
+
+    Args:
+        file_path (str): OpenCC TSCharacters.txt ('<traditional>\t<simplified> ...')
+
+    Returns:
+        Dict[str, str]: character -> its first (most common) simplified form
+    """
+    entries = {}
+    with open(file_path, encoding='utf-8') as f:
+        for line in f:
+            traditional, _, simplified = line.rstrip('\n').partition('\t')
+            if traditional and simplified:
+                entries[traditional] = simplified.split()
+    # A character that is some entry's simplified form is valid simplified text
+    simplified_chars = {ch for forms in entries.values() for ch in forms}
+    return {
+        traditional: forms[0]
+        for traditional, forms in entries.items()
+        if traditional not in simplified_chars and traditional not in NOT_TRADITIONAL_ONLY
+    }
+
+
+TRADITIONAL_TO_SIMPLIFIED = str.maketrans(load_traditional_map())
+
+# Misspellings and alternate names -> canonical token (after folding).
+# Aliases match whole tokens, so a variant must be something the tokenizer
+# emits as one token (no spaces or punctuation).
+DEFAULT_ALIASES = {
+    'colse': 'coles',
+    'woolies': 'woolworths',
+}
+ALIAS_FILE = 'word_frequency/aliases.json'
+
+
+def fold_key(text: str) -> str:
+    """Width, script and case folding without aliases (for dictionary keys)."""
+    text = unicodedata.normalize('NFKC', text)
+    return ' '.join(text.translate(TRADITIONAL_TO_SIMPLIFIED).casefold().split())
+
+
+def load_aliases(file_path: Optional[str] = ALIAS_FILE) -> Dict[str, str]:
+    """Default aliases plus an optional {variant: canonical} JSON file."""
+    aliases = dict(DEFAULT_ALIASES)
+    if file_path and os.path.exists(file_path):
+        aliases.update(load_json(file_path))
+    folded = {}
+    for variant, canonical in aliases.items():
+        variant = fold_key(variant)
+        if ' ' in variant:
+            print(f"Ignoring alias '{variant}': aliases must be single tokens")
+            continue
+        folded[variant] = fold_key(canonical)
+    return folded
+
+
+class Normalizer:
+    """
+    fold_text() folds raw text before tokenizing; calling the normalizer on
+    a token then applies the aliases. Both are memoised, per character and
+    per token, since the alphabet and vocabulary are small next to the text.
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, str]] = None):
+        self.aliases = load_aliases() if aliases is None else aliases
+        self._chars: Dict[str, str] = {}
+        self._tokens: Dict[str, str] = {}
+
+    def fold_text(self, text: str) -> Tuple[str, List[int]]:
+        """
+        Fold text character by character
+
+        Returns:
+            Tuple[str, List[int]]: folded text and, for every folded position
+            (plus the end), the position in text it came from, so tokens of
+            the folded text can be traced back to their original spelling
+        """
+        chars = self._chars
+        pieces = []
+        offsets = []
+        for i, ch in enumerate(text):
+            folded = chars.get(ch)
+            if folded is None:
+                folded = chars[ch] = unicodedata.normalize('NFKC', ch).translate(
+                    TRADITIONAL_TO_SIMPLIFIED).casefold()
+            pieces.append(folded)
+            offsets.extend([i] * len(folded))
+        offsets.append(len(text))
+        return ''.join(pieces), offsets
+
+    def __call__(self, token: str) -> str:
+        normalized = self._tokens.get(token)
+        if normalized is None:
+            folded = fold_key(token)
+            normalized = self._tokens[token] = self.aliases.get(folded, folded) or token
+        return normalized
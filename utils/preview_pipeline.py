@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fast preview of the whole pipeline on a sample: count a stratified sample
+of notes, label with the current compact rules, aggregate countries, and
+report label shares and country percentages with bootstrap confidence
+intervals. Meant for checking a rule or stopword change in seconds before
+a full rerun.
+"""
+
+import argparse
+from collections import Counter
+from typing import Dict, List
+
+from build_frequencies import sample_unit_counts
+from compact_labeling import CONTEXT_NOISE, get_compact_labels
+from json_codec import dump_json
+from normalize_text import Normalizer, load_aliases
+from process_countries import country_of, create_output, process_country_frequencies
+from sampling import bootstrap_intervals, scaled_counts
+from word_records import load_word_records
+
+TOTAL = '_tokens'
+
+
+class WordLabeler:
+    """Labels and country per word with the current rules, memoised per word."""
+
+    def __init__(self, vocabulary_file: str, normalizer: Normalizer):
+        # Translations come from the last full run, keyed by the normalized word
+        # the sample is counted under; new words are labeled on zh alone
+        self.translations: Dict[str, str] = {}
+        for w in load_word_records(vocabulary_file):
+            self.translations.setdefault(normalizer(w.zh), w.en)
+        self._keys: Dict[str, List[str]] = {}
+
+    def word(self, zh: str, frequency: int) -> dict:
+        en = self.translations.get(zh, '')
+        return {'zh': zh, 'en': en, 'frequency': frequency, 'labels': get_compact_labels(zh, en)}
+
+    def keys(self, zh: str) -> List[str]:
+        """'label:<name>' and 'country:<name>' keys a token of this word counts towards."""
+        keys = self._keys.get(zh)
+        if keys is None:
+            en = self.translations.get(zh, '')
+            labels = get_compact_labels(zh, en)
+            keys = ['label:' + l for l in labels if l not in CONTEXT_NOISE]
+            country = country_of(en, labels)
+            if country:
+                keys.append('country:' + country)
+            self._keys[zh] = keys
+        return keys
+
+
+def share_statistic(totals: Counter) -> Dict[str, float]:
+    """Label share of all tokens and country share of country mentions, in percent."""
+    tokens = totals.get(TOTAL, 0)
+    countries = sum(v for k, v in totals.items() if k.startswith('country:'))
+    shares = {}
+    for key, value in totals.items():
+        if key.startswith('label:') and tokens:
+            shares[key] = value / tokens * 100
+        elif key.startswith('country:') and countries:
+            shares[key] = value / countries * 100
+    return shares
+
+
+def preview(json_dir: str, vocabulary_file: str, fraction: float, seed: int = 0,
+            replicates: int = 200, confidence: float = 0.95, alias_file: str = None) -> dict:
+    normalizer = Normalizer(load_aliases(alias_file))
+    strata, unit_counts, _ = sample_unit_counts(json_dir, fraction, seed, normalizer)
+    labeler = WordLabeler(vocabulary_file, normalizer)
+
+    # Stage outputs on scaled counts, in the same shapes as the full pipeline
+    frequencies = scaled_counts(strata, unit_counts)
+    words = [labeler.word(zh, freq) for zh, freq in frequencies.most_common() if freq > 0]
+    country_output = create_output(*process_country_frequencies(words, country_of.mapping)[:2])
+
+    # Reduce each sampled note to a handful of label/country totals for the bootstrap
+    reduced = {}
+    for name, units in unit_counts.items():
+        reduced[name] = []
+        for counts in units:
+            totals: Counter = Counter({TOTAL: sum(counts.values())})
+            for zh, count in counts.items():
+                for key in labeler.keys(zh):
+                    totals[key] += count
+            reduced[name].append(totals)
+    estimate = share_statistic(scaled_counts(strata, reduced))
+    intervals = bootstrap_intervals(strata, reduced, share_statistic, replicates, confidence, seed)
+
+    def rows(prefix: str) -> List[dict]:
+        out = [
+            {
+                'name': key[len(prefix):],
+                'share': round(value, 2),
+                'low': round(intervals.get(key, (value, value))[0], 2),
+                'high': round(intervals.get(key, (value, value))[1], 2),
+            }
+            for key, value in estimate.items() if key.startswith(prefix)
+        ]
+        out.sort(key=lambda x: x['share'], reverse=True)
+        return out
+
+    return {
+        'sample_fraction': fraction,
+        'seed': seed,
+        'confidence': confidence,
+        'sampled_notes': sum(len(s.units) for s in strata),
+        'total_notes': sum(s.population for s in strata),
+        'estimated_tokens': sum(frequencies.values()),
+        'labels': rows('label:'),
+        'countries': rows('country:'),
+        'country_analysis': country_output,
+    }
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Sampled preview of labeling and country shares')
+    parser.add_argument('--json-dir', default='word_frequency/json')
+    parser.add_argument('--vocabulary',
+                        default='word_frequency/xhs_all_content_wordcloud_frequencies_compact_labeled.json',
+                        help='labeled or translated words from the last full run (for en translations)')
+    parser.add_argument('--sample', type=float, default=0.1, metavar='FRACTION')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--replicates', type=int, default=200)
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--aliases', default='word_frequency/aliases.json')
+    parser.add_argument('--output', help='optional JSON report path')
+    args = parser.parse_args()
+    if not 0 < args.sample <= 1:
+        parser.error('--sample must be a fraction in (0, 1]')
+
+    result = preview(args.json_dir, args.vocabulary, args.sample, args.seed, args.replicates, args.confidence,
+                     args.aliases)
+    if args.output:
+        dump_json(result, args.output)
+
+    level = round(args.confidence * 100)
+    print(f"Sampled {result['sampled_notes']} of {result['total_notes']} notes, "
+          f"~{result['estimated_tokens']} tokens after scaling")
+    print(f"\nLabel share of tokens ({level}% CI):")
+    for r in result['labels']:
+        print(f"  {r['name']}: {r['share']}% [{r['low']}, {r['high']}]")
+    print(f"\nCountry share of mentions ({level}% CI):")
+    for r in result['countries']:
+        print(f"  {r['name']}: {r['share']}% [{r['low']}, {r['high']}]")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,14 +4,18 @@ Clean and simple country data processor
 No bullshit, just gets the job done
 """
 
-import json
+import os
 from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+from hyperloglog import load_sketches, merge_all
+from json_codec import decode_records, dump_json
+from normalize_text import fold_key
 
 def load_data():
     """Load the source data file"""
     file_path = '/Users/zoea/Projects/sff/sff-demo/word_frequency/xhs_all_content_wordcloud_frequencies_compact_labeled.json'
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return decode_records(file_path, 'labeled_word')
 
 def get_country_mapping():
     """Country name normalization - keep it simple"""
@@ -98,33 +102,57 @@ def get_country_mapping():
         'Russia': 'Russia', 'Moscow': 'Russia', 'Saint Petersburg': 'Russia', 'Novosibirsk': 'Russia',
     }
 
-def process_country_frequencies(data, mapping):
+COUNTRY_LABELS = ('origin_country', 'city_region')
+
+class CountryLookup:
+    """Exact English name first, then its width/case/script-folded form ('AUSTRALIA', 'Ｊａｐａｎ')"""
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.mapping = mapping
+        self.folded = {fold_key(name): country for name, country in mapping.items()}
+
+    def __call__(self, en: str, labels: Iterable[str]) -> Optional[str]:
+        """Country a word counts towards; only origin_country / city_region words count"""
+        if not any(l in COUNTRY_LABELS for l in labels):
+            return None
+        return self.mapping.get(en) or self.folded.get(fold_key(en))
+
+# Shared lookup over the default mapping, used by every script that counts countries
+country_of = CountryLookup(get_country_mapping())
+
+def process_country_frequencies(data, mapping, sketches=None):
     """Extract and aggregate country frequencies with original words"""
     frequencies = defaultdict(int)
     country_words = defaultdict(list)
+    country_sketches = defaultdict(list)
+    lookup = country_of if mapping == country_of.mapping else CountryLookup(mapping)
     
     for item in data:
-        # Check for both origin_country and city_region labels
-        labels = item.get('labels', [])
-        if 'origin_country' not in labels and 'city_region' not in labels:
-            continue
-            
         en_name = item.get('en', '')
         zh_name = item.get('zh', '')
         frequency = item.get('frequency', 0)
         
-        country = mapping.get(en_name)
+        country = lookup(en_name, item.get('labels', []))
         if country:
             frequencies[country] += frequency
-            country_words[country].append({
+            word = {
                 'zh': zh_name,
                 'en': en_name,
                 'frequency': frequency
-            })
+            }
+            if 'reach' in item:
+                word['reach'] = item['reach']
+            country_words[country].append(word)
+            if sketches and zh_name in sketches:
+                country_sketches[country].append(sketches[zh_name])
     
-    return dict(frequencies), dict(country_words)
+    # Distinct users per country: union of its words' sketches, not a sum
+    reach = None
+    if sketches is not None:
+        reach = {country: merge_all(country_sketches[country]).count() for country in frequencies}
+    return dict(frequencies), dict(country_words), reach
 
-def create_output(frequencies, country_words):
+def create_output(frequencies, country_words, reach=None):
     """Create final output structure"""
     total = sum(frequencies.values())
     sorted_items = sorted(frequencies.items(), key=lambda x: x[1], reverse=True)
@@ -134,6 +162,7 @@ def create_output(frequencies, country_words):
             {
                 'name': country,
                 'frequency': freq,
+                **({'reach': reach.get(country, 0)} if reach is not None else {}),
                 'percentage': round((freq / total) * 100, 2) if total > 0 else 0,
                 'words': sorted(country_words.get(country, []), key=lambda x: x['frequency'], reverse=True)
             }
@@ -147,13 +176,14 @@ def main():
     """Main execution - keep it simple"""
     data = load_data()
     mapping = get_country_mapping()
-    frequencies, country_words = process_country_frequencies(data, mapping)
-    result = create_output(frequencies, country_words)
+    sketch_path = '/Users/zoea/Projects/sff/sff-demo/word_frequency/xhs_all_content_reach_sketches.json'
+    sketches = load_sketches(sketch_path) if os.path.exists(sketch_path) else None
+    frequencies, country_words, reach = process_country_frequencies(data, mapping, sketches)
+    result = create_output(frequencies, country_words, reach)
     
     # Write output
     output_path = '/Users/zoea/Projects/sff/sff-demo/public/data/country_analysis.json'
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    dump_json(result, output_path)
     
     # Simple output
     print(f"Processed {result['unique_countries']} countries, {result['total_mentions']} total mentions")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Regional demand from comment ip_location: region x label matrix and top
+words per region, streamed shard by shard
+"""
+
+import glob
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from compact_labeling import CONTEXT_NOISE
+from json_codec import decode_records, dump_json
+from normalize_text import Normalizer, load_aliases
+from text_tokens import document_tokens
+from word_records import load_word_records
+
+# Labels that say nothing about demand; kept in the matrix, left out of top words
+LOW_SIGNAL_LABELS = {'other', 'not_important'}
+TOP_WORDS_PER_REGION = 20
+
+# ip_location value -> (region, country). Chinese provinces stay separate
+# regions; other places are reported at country level.
+CHINA_PROVINCES = {
+    '北京': 'Beijing', '天津': 'Tianjin', '上海': 'Shanghai', '重庆': 'Chongqing',
+    '河北': 'Hebei', '山西': 'Shanxi', '辽宁': 'Liaoning', '吉林': 'Jilin',
+    '黑龙江': 'Heilongjiang', '江苏': 'Jiangsu', '浙江': 'Zhejiang', '安徽': 'Anhui',
+    '福建': 'Fujian', '江西': 'Jiangxi', '山东': 'Shandong', '河南': 'Henan',
+    '湖北': 'Hubei', '湖南': 'Hunan', '广东': 'Guangdong', '海南': 'Hainan',
+    '四川': 'Sichuan', '贵州': 'Guizhou', '云南': 'Yunnan', '陕西': 'Shaanxi',
+    '甘肃': 'Gansu', '青海': 'Qinghai', '内蒙古': 'Inner Mongolia', '广西': 'Guangxi',
+    '西藏': 'Tibet', '宁夏': 'Ningxia', '新疆': 'Xinjiang',
+}
+COUNTRIES = {
+    '中国': 'China', '澳大利亚': 'Australia', '澳洲': 'Australia', '新西兰': 'New Zealand',
+    '美国': 'United States', '加拿大': 'Canada', '英国': 'United Kingdom', '日本': 'Japan',
+    '韩国': 'South Korea', '新加坡': 'Singapore', '马来西亚': 'Malaysia', '泰国': 'Thailand',
+    '越南': 'Vietnam', '印度尼西亚': 'Indonesia', '菲律宾': 'Philippines', '德国': 'Germany',
+    '法国': 'France', '意大利': 'Italy', '西班牙': 'Spain', '荷兰': 'Netherlands',
+    '瑞士': 'Switzerland', '俄罗斯': 'Russia', '南非': 'South Africa', '巴西': 'Brazil',
+    '阿根廷': 'Argentina', '智利': 'Chile', '阿联酋': 'United Arab Emirates',
+    '中国香港': 'Hong Kong', '香港': 'Hong Kong', '中国澳门': 'Macau', '澳门': 'Macau',
+    '中国台湾': 'Taiwan', '台湾': 'Taiwan',
+}
+# Suffixed spellings are accepted too ('广东省' -> '广东')
+LOCATION_SUFFIXES = ('壮族自治区', '回族自治区', '维吾尔自治区', '自治区', '特别行政区', '省', '市')
+
+
+def build_location_table() -> Dict[str, Tuple[str, str]]:
+    """Precompute every accepted ip_location spelling -> (region, country)."""
+    table: Dict[str, Tuple[str, str]] = {}
+    for zh, en in CHINA_PROVINCES.items():
+        table[zh] = (en, 'China')
+        table[en.lower()] = (en, 'China')
+    for zh, en in COUNTRIES.items():
+        table[zh] = (en, en)
+        table[en.lower()] = (en, en)
+    for key, location in list(table.items()):
+        if key.isascii():
+            continue
+        for suffix in LOCATION_SUFFIXES:
+            table.setdefault(key + suffix, location)
+    return table
+
+
+def normalize_location(raw: Optional[str], table: Dict[str, Tuple[str, str]]) -> Optional[Tuple[str, str]]:
+    """Map a raw ip_location to (region, country); None if empty or unknown."""
+    if not raw:
+        return None
+    key = raw.strip()
+    return table.get(key) or table.get(key.lower())
+
+
+class RegionAggregator:
+    """One-pass accumulator for comments grouped by normalized region."""
+
+    def __init__(self, vocabulary: Dict[str, Tuple[str, Tuple[str, ...]]],
+                 normalizer: Optional[Normalizer] = None):
+        self.vocabulary = vocabulary  # zh -> (en, labels)
+        self.normalizer = normalizer
+        self.table = build_location_table()
+        self.region_country: Dict[str, str] = {}
+        self.comments: Counter = Counter()
+        self.label_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.word_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.unknown_location = 0
+        self.unmapped: Counter = Counter()
+        self.total = 0
+
+    def add(self, comment: dict):
+        self.total += 1
+        raw = comment.get('ip_location')
+        location = normalize_location(raw, self.table)
+        if location is None:
+            if raw and raw.strip():
+                self.unmapped[raw.strip()] += 1
+            else:
+                self.unknown_location += 1
+            return
+
+        region, country = location
+        self.region_country[region] = country
+        self.comments[region] += 1
+        labels_here = self.label_counts[region]
+        words_here = self.word_counts[region]
+        for token in document_tokens(comment.get('content') or '', self.normalizer):
+            entry = self.vocabulary.get(token)
+            if entry is None:
+                continue
+            labels = entry[1]
+            labels_here.update(labels)
+            if not LOW_SIGNAL_LABELS.issuperset(labels):
+                words_here[token] += 1
+
+    def result(self) -> dict:
+        located = sum(self.comments.values())
+        labels = sorted({l for counts in self.label_counts.values() for l in counts})
+        regions = [region for region, _ in self.comments.most_common()]
+        return {
+            'regions': [
+                {
+                    'name': region,
+                    'country': self.region_country[region],
+                    'comments': self.comments[region],
+                    'percentage': round(self.comments[region] / located * 100, 2) if located else 0,
+                    'top_words': [
+                        {'zh': zh, 'en': self.vocabulary[zh][0], 'frequency': freq}
+                        for zh, freq in self.word_counts[region].most_common(TOP_WORDS_PER_REGION)
+                    ],
+                }
+                for region in regions
+            ],
+            # matrix[i][j]: mentions of label j in comments from regions[i]
+            'labels': labels,
+            'matrix': [[self.label_counts[region][l] for l in labels] for region in regions],
+            'total_comments': self.total,
+            'located_comments': located,
+            'unknown_location_comments': self.unknown_location,
+            'unmapped_locations': dict(self.unmapped.most_common()),
+        }
+
+
+def load_vocabulary(file_path: str, normalizer: Optional[Normalizer] = None
+                    ) -> Dict[str, Tuple[str, Tuple[str, ...]]]:
+    """
+    Labeled vocabulary as zh -> (en, labels), contextual noise tags removed.
+    With a normalizer words are keyed by their canonical form, the first
+    (most frequent) spelling winning, to match normalized comment tokens.
+    """
+    vocabulary = {}
+    for w in load_word_records(file_path):
+        key = normalizer(w.zh) if normalizer else w.zh
+        vocabulary.setdefault(key, (w.en, tuple(l for l in w.labels if l not in CONTEXT_NOISE)))
+    return vocabulary
+
+
+def process_regions(comment_files: List[str], vocabulary_file: str,
+                    normalizer: Optional[Normalizer] = None) -> dict:
+    """Stream comment shards one file at a time into the region aggregate."""
+    aggregator = RegionAggregator(load_vocabulary(vocabulary_file, normalizer), normalizer)
+    for path in comment_files:
+        for comment in decode_records(path, 'comment'):
+            aggregator.add(comment)
+    return aggregator.result()
+
+
+def main():
+    """Main function"""
+    comment_files = sorted(glob.glob('word_frequency/json/search_comments_*.json'))
+    vocabulary_file = 'word_frequency/xhs_all_content_wordcloud_frequencies_compact_labeled.json'
+    output_file = 'public/data/region_analysis.json'
+
+    # Same normalization and aliases as build_frequencies, so tokens match vocabulary keys
+    result = process_regions(comment_files, vocabulary_file, Normalizer(load_aliases()))
+    dump_json(result, output_file)
+
+    print(f"Processed {result['total_comments']} comments from {len(comment_files)} files → {output_file}")
+    print(f"  located: {result['located_comments']}, no location: {result['unknown_location_comments']}, "
+          f"unmapped: {sum(result['unmapped_locations'].values())}")
+    for region in result['regions'][:5]:
+        print(f"  {region['name']} ({region['country']}): {region['comments']} comments ({region['percentage']}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reproducible stratified sampling of crawl shards and bootstrap confidence
+intervals, for fast previews of the pipeline
+"""
+
+import math
+import random
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from json_codec import decode_records
+from text_tokens import note_text
+
+# (note_id, [(text, user_id), ...]): a note together with its comments
+Unit = Tuple[str, List[Tuple[str, str]]]
+
+
+def iter_units(contents_file: Optional[str], comments_file: Optional[str]) -> List[Unit]:
+    """Group a shard's documents by note so a note and its comments are sampled together."""
+    units: Dict[str, List[Tuple[str, str]]] = {}
+    if contents_file:
+        for note in decode_records(contents_file, 'note'):
+            units.setdefault(note['note_id'], []).append((note_text(note), note.get('user_id') or ''))
+    if comments_file:
+        for comment in decode_records(comments_file, 'comment'):
+            units.setdefault(comment['note_id'], []).append(
+                (comment.get('content') or '', comment.get('user_id') or ''))
+    return list(units.items())
+
+
+def reservoir_sample(items: Iterable, k: int, rng: random.Random) -> list:
+    """Uniform sample of k items from a stream of unknown length (Algorithm R)."""
+    reservoir = []
+    for i, item in enumerate(items):
+        if i < k:
+            reservoir.append(item)
+        else:
+            j = rng.randint(0, i)
+            if j < k:
+                reservoir[j] = item
+    return reservoir
+
+
+class Stratum:
+    """Sampled units of one crawl date; each unit stands for `weight` units of the population."""
+
+    __slots__ = ('name', 'population', 'units')
+
+    def __init__(self, name: str, population: int, units: List[Unit]):
+        self.name = name
+        self.population = population
+        self.units = units
+
+    @property
+    def weight(self) -> float:
+        return self.population / len(self.units) if self.units else 0.0
+
+
+def stratified_sample(shards, fraction: float, seed: int = 0) -> List[Stratum]:
+    """
+    Sample a fraction of the notes (with their comments) from every daily
+    shard, at least one per non-empty shard
+
+    Each date gets its own generator seeded from (seed, date), so adding a
+    new shard does not change the sample drawn from the existing ones.
+    """
+    if not 0 < fraction <= 1:
+        raise ValueError(f"sample fraction must be in (0, 1], got {fraction}")
+    strata = []
+    for date, contents_file, comments_file in shards:
+        units = iter_units(contents_file, comments_file)
+        if not units:
+            continue
+        k = min(len(units), max(1, math.ceil(fraction * len(units))))
+        rng = random.Random(f'{seed}:{date}')
+        strata.append(Stratum(date, len(units), reservoir_sample(units, k, rng)))
+    return strata
+
+
+def scaled_counts(strata: List[Stratum], unit_counts: Dict[str, List[Counter]]) -> Counter:
+    """Horvitz-Thompson estimate of population counts from per-unit counts."""
+    total: Counter = Counter()
+    for stratum in strata:
+        weight = stratum.weight
+        for counts in unit_counts[stratum.name]:
+            for key, value in counts.items():
+                total[key] += value * weight
+    return Counter({key: round(value) for key, value in total.items()})
+
+
+def bootstrap_intervals(strata: List[Stratum], unit_counts: Dict[str, List[Counter]],
+                        statistic: Callable[[Counter], Dict[str, float]],
+                        replicates: int = 200, confidence: float = 0.95,
+                        seed: int = 0) -> Dict[str, Tuple[float, float]]:
+    """
+    Percentile confidence intervals for statistic(scaled counts)
+
+    Units are resampled with replacement within each stratum, which keeps
+    the per-date weights and treats a note and its comments as one draw.
+    unit_counts should already be reduced to the few keys the statistic
+    needs (labels, countries), so each replicate stays cheap.
+    """
+    rng = random.Random(seed)
+    samples: Dict[str, List[float]] = {}
+    for _ in range(replicates):
+        total: Counter = Counter()
+        for stratum in strata:
+            counts = unit_counts[stratum.name]
+            weight = stratum.weight
+            for _ in range(len(counts)):
+                for key, value in counts[rng.randrange(len(counts))].items():
+                    total[key] += value * weight
+        for name, value in statistic(total).items():
+            samples.setdefault(name, []).append(value)
+
+    tail = (1 - confidence) / 2
+    intervals = {}
+    for name, values in samples.items():
+        # Names missing from some replicates had a value of 0 there
+        values = sorted(values + [0.0] * (replicates - len(values)))
+        intervals[name] = (_percentile(values, tail), _percentile(values, 1 - tail))
+    return intervals
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    position = q * (len(values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
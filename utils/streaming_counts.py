@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bounded-memory approximate counting: Count-Min Sketch for frequency
+estimates and Space-Saving for the top-k heavy hitters
+"""
+
+import hashlib
+import heapq
+import math
+from array import array
+from typing import Dict, List, Tuple
+
+
+class CountMinSketch:
+    """
+    Count-Min Sketch.
+
+    With width = ceil(e / epsilon) and depth = ceil(ln(1 / delta)), an
+    estimate exceeds the true count by more than epsilon * total with
+    probability at most delta; it never underestimates. Sketches with the
+    same parameters merge by adding their tables.
+    """
+
+    def __init__(self, epsilon: float = 0.0005, delta: float = 0.001):
+        if not 0 < epsilon < 1 or not 0 < delta < 1:
+            raise ValueError("Count-Min epsilon and delta must be in (0, 1)")
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.tables = [array('Q', [0]) * self.width for _ in range(self.depth)]
+        self.total = 0
+
+    def _columns(self, key: str):
+        # Kirsch-Mitzenmacher: depth hash functions from two 64-bit halves
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        width = self.width
+        return [(h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, key: str, count: int = 1):
+        for row, column in enumerate(self._columns(key)):
+            self.tables[row][column] += count
+        self.total += count
+
+    def estimate(self, key: str) -> int:
+        return min(self.tables[row][column] for row, column in enumerate(self._columns(key)))
+
+    @property
+    def error_bound(self) -> float:
+        """Additive overestimate bound (epsilon * total) holding with probability 1 - delta."""
+        return self.epsilon * self.total
+
+    def merge(self, other: 'CountMinSketch'):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge Count-Min sketches with different dimensions")
+        for table, other_table in zip(self.tables, other.tables):
+            for column, value in enumerate(other_table):
+                if value:
+                    table[column] += value
+        self.total += other.total
+
+
+class SpaceSaving:
+    """
+    Space-Saving top-k summary.
+
+    Keeps at most k counters; an unseen item replaces the current minimum and
+    inherits its count as error. Every item with true count above total / k
+    is guaranteed to be kept, and counts never underestimate.
+    """
+
+    def __init__(self, k: int = 5000):
+        if k < 1:
+            raise ValueError("Space-Saving needs k >= 1")
+        self.k = k
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.total = 0
+        # Lazy min-heap of (count, item); stale entries are skipped on pop
+        self._heap: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def _push(self, item: str, count: int):
+        heapq.heappush(self._heap, (count, item))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(c, i) for i, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[int, str]:
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return count, item
+
+    def min_count(self) -> int:
+        """Smallest kept count, or 0 while the summary is not full."""
+        if len(self.counts) < self.k:
+            return 0
+        while self.counts.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0]
+
+    def add(self, item: str, count: int = 1):
+        self.total += count
+        current = self.counts.get(item)
+        if current is not None:
+            self.counts[item] = current + count
+        elif len(self.counts) < self.k:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            floor, evicted = self._pop_min()
+            del self.counts[evicted]
+            del self.errors[evicted]
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+        self._push(item, self.counts[item])
+
+    def merge(self, other: 'SpaceSaving'):
+        """
+        Merge another summary. Items missing from a full summary are charged
+        its minimum count, which keeps the merged counts upper bounds.
+        """
+        floor_self = self.min_count()
+        floor_other = other.min_count()
+        counts: Dict[str, int] = {}
+        errors: Dict[str, int] = {}
+        for item in set(self.counts) | set(other.counts):
+            counts[item] = self.counts.get(item, floor_self) + other.counts.get(item, floor_other)
+            errors[item] = self.errors.get(item, floor_self) + other.errors.get(item, floor_other)
+
+        self.k = max(self.k, other.k)
+        kept = heapq.nlargest(self.k, counts.items(), key=lambda x: x[1])
+        self.counts = dict(kept)
+        self.errors = {item: errors[item] for item in self.counts}
+        self.total += other.total
+        self._heap = [(c, i) for i, c in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def top(self, n: int = None) -> List[Tuple[str, int, int]]:
+        """Return (item, count, error) sorted by count, highest first."""
+        ranked = sorted(self.counts.items(), key=lambda x: x[1], reverse=True)
+        if n is not None:
+            ranked = ranked[:n]
+        return [(item, count, self.errors[item]) for item, count in ranked]
+
+
+class HeavyHitters:
+    """Count-Min Sketch plus Space-Saving, updated and merged together."""
+
+    def __init__(self, k: int = 5000, epsilon: float = 0.0005, delta: float = 0.001):
+        self.sketch = CountMinSketch(epsilon, delta)
+        self.summary = SpaceSaving(k)
+
+    def update(self, items):
+        for item in items:
+            self.sketch.add(item)
+            self.summary.add(item)
+
+    def merge(self, other: 'HeavyHitters'):
+        self.sketch.merge(other.sketch)
+        self.summary.merge(other.summary)
+
+    def top(self, n: int = None) -> List[Tuple[str, int]]:
+        """Top items with the tighter of the two (over)estimates."""
+        estimates = [
+            (item, min(count, self.sketch.estimate(item)))
+            for item, count, _ in self.summary.top()
+        ]
+        estimates.sort(key=lambda x: x[1], reverse=True)
+        return estimates[:n] if n is not None else estimates
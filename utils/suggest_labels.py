@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suggest compact labels for words that fell into 'other', using character
+n-gram TF-IDF similarity to already-labeled words
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from compact_labeling import CONTEXT_NOISE
+from json_codec import dump_json
+from word_records import WordRecord, load_word_records
+
+# Cue words tagged not_important are deliberately excluded, not unlabeled
+UNLABELED = {'other'}
+NON_BUSINESS = UNLABELED | {'not_important'}
+# Dense similarity block size is capped at this many cells (float32)
+MAX_BLOCK_CELLS = 1 << 24
+
+
+def char_ngrams(word: WordRecord) -> List[str]:
+    """Chinese 1-3 grams and padded English 3-4 grams, kept apart by prefix."""
+    grams = []
+    zh = word.zh.lower()
+    for n in (1, 2, 3):
+        grams.extend('z:' + zh[i:i + n] for i in range(len(zh) - n + 1))
+    en = f' {word.en.lower()} '
+    for n in (3, 4):
+        grams.extend('e:' + en[i:i + n] for i in range(len(en) - n + 1))
+    return grams
+
+
+def tfidf_matrix(words: List[WordRecord]) -> sparse.csr_matrix:
+    """Rows are L2-normalised sublinear TF-IDF vectors over character n-grams."""
+    vocabulary: Dict[str, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    data: List[float] = []
+    for word in words:
+        counts: Dict[int, int] = {}
+        for gram in char_ngrams(word):
+            column = vocabulary.setdefault(gram, len(vocabulary))
+            counts[column] = counts.get(column, 0) + 1
+        indices.extend(counts.keys())
+        data.extend(counts.values())
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices), np.asarray(indptr)),
+        shape=(len(words), len(vocabulary)),
+    )
+    matrix.data = 1 + np.log(matrix.data)
+
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + matrix.shape[0]) / (1 + document_frequency)) + 1
+    matrix = matrix.multiply(idf.astype(np.float32)).tocsr()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms).dot(matrix).tocsr().astype(np.float32)
+
+
+def nearest_labeled(unlabeled: sparse.csr_matrix, labeled: sparse.csr_matrix,
+                    k: int = 10, block_size: int = 4096) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k cosine neighbours among labeled rows for every unlabeled row
+
+    Similarities are computed one block of unlabeled rows at a time as a
+    sparse-by-sparse product, so memory stays bounded by the block.
+
+    Returns:
+        (indices, similarities), both shaped (n_unlabeled, k), best first
+    """
+    n_unlabeled, n_labeled = unlabeled.shape[0], labeled.shape[0]
+    k = min(k, n_labeled)
+    block_size = max(1, min(block_size, MAX_BLOCK_CELLS // max(n_labeled, 1)))
+    labeled_t = labeled.T.tocsc()
+
+    top_indices = np.zeros((n_unlabeled, k), dtype=np.int64)
+    top_scores = np.zeros((n_unlabeled, k), dtype=np.float32)
+    for start in range(0, n_unlabeled, block_size):
+        stop = min(start + block_size, n_unlabeled)
+        scores = (unlabeled[start:stop] @ labeled_t).toarray()
+        if k < n_labeled:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.tile(np.arange(n_labeled), (stop - start, 1))
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        top_indices[start:stop] = np.take_along_axis(candidates, order, axis=1)
+        top_scores[start:stop] = np.take_along_axis(candidate_scores, order, axis=1)
+    return top_indices, top_scores
+
+
+def suggest_labels(words: List[WordRecord], k: int = 10, min_similarity: float = 0.3,
+                   block_size: int = 4096) -> List[dict]:
+    """
+    Propose a label for each unlabeled word by similarity-weighted vote of
+    its labeled neighbours. Confidence is the summed similarity of the
+    neighbours carrying the winning label divided by k, so it is in [0, 1]
+    and only gets high when several close neighbours agree.
+    """
+    def business_labels(word: WordRecord) -> List[str]:
+        return [l for l in word.labels if l not in NON_BUSINESS and l not in CONTEXT_NOISE]
+
+    labeled_ids = [i for i, w in enumerate(words) if business_labels(w)]
+    unlabeled_ids = [i for i, w in enumerate(words) if not business_labels(w) and any(l in UNLABELED for l in w.labels)]
+    if not labeled_ids or not unlabeled_ids:
+        return []
+
+    matrix = tfidf_matrix(words)
+    neighbours, similarities = nearest_labeled(matrix[unlabeled_ids], matrix[labeled_ids], k, block_size)
+    similarities[similarities < min_similarity] = 0
+
+    # Labeled-word x label indicator matrix, then one product for all votes
+    label_names = sorted({l for i in labeled_ids for l in business_labels(words[i])})
+    label_column = {l: j for j, l in enumerate(label_names)}
+    rows, columns = [], []
+    for row, i in enumerate(labeled_ids):
+        for l in business_labels(words[i]):
+            rows.append(row)
+            columns.append(label_column[l])
+    indicator = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(len(labeled_ids), len(label_names)),
+    )
+    n_unlabeled, k = neighbours.shape
+    weights = sparse.csr_matrix(
+        (similarities.ravel(), neighbours.ravel(), np.arange(0, n_unlabeled * k + 1, k)),
+        shape=(n_unlabeled, len(labeled_ids)),
+    )
+    votes = (weights @ indicator).toarray()
+    best = votes.argmax(axis=1)
+    confidence = votes[np.arange(n_unlabeled), best] / k
+
+    suggestions = []
+    for row, i in enumerate(unlabeled_ids):
+        if confidence[row] <= 0:
+            continue
+        word = words[i]
+        suggestions.append({
+            'zh': word.zh,
+            'en': word.en,
+            'frequency': word.frequency,
+            'suggested_label': label_names[best[row]],
+            'confidence': round(float(confidence[row]), 3),
+            'neighbours': [
+                {'zh': words[labeled_ids[j]].zh, 'similarity': round(float(s), 3)}
+                for j, s in zip(neighbours[row][:3], similarities[row][:3]) if s > 0
+            ],
+        })
+    suggestions.sort(key=lambda x: (x['confidence'], x['frequency']), reverse=True)
+    return suggestions
+
+
+def main():
+    """Main function"""
+    input_file = 'word_frequency/xhs_all_content_wordcloud_frequencies_compact_labeled.json'
+    output_file = 'word_frequency/label_suggestions.json'
+
+    words = load_word_records(input_file)
+    suggestions = suggest_labels(words)
+    dump_json(suggestions, output_file)
+
+    print(f"Suggested labels for {len(suggestions)} of {len(words)} words → {output_file}")
+    for s in suggestions[:15]:
+        print(f"  {s['zh']} ({s['en']}) -> {s['suggested_label']} [{s['confidence']}] "
+              f"via {', '.join(n['zh'] for n in s['neighbours'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared tokenizer for Xiaohongshu note and comment text
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+import jieba
+
+from normalize_text import Normalizer
+
+# Hashtag markers like '#澳洲[话题]#' keep the topic word only
+TOPIC_TAG = re.compile(r'\[话题\]|#')
+# Emoji tags like '[偷笑R]' keep the emoji name
+EMOJI_TAG = re.compile(r'\[([^\[\]]+?)R?\]')
+URL = re.compile(r'https?://\S+')
+WORD_CHAR = re.compile(r'\w')
+
+
+def clean_text(text: str) -> str:
+    """Strip platform markup (URLs, topic and emoji tags) from raw text."""
+    if not text:
+        return ''
+    text = URL.sub(' ', text)
+    text = TOPIC_TAG.sub(' ', text)
+    return EMOJI_TAG.sub(r' \1 ', text)
+
+
+def tokenize(text: str, min_length: int = 2) -> List[str]:
+    """
+    Split raw note/comment text into vocabulary tokens
+
+    Args:
+        text (str): Raw text
+        min_length (int): Minimum token length to keep
+
+    Returns:
+        List[str]: Tokens in order of appearance (duplicates kept)
+    """
+    tokens = []
+    for token in jieba.lcut(clean_text(text)):
+        token = token.strip()
+        if len(token) >= min_length and WORD_CHAR.search(token):
+            tokens.append(token)
+    return tokens
+
+
+def tokenize_folded(text: str, fold: Callable[[str], Tuple[str, List[int]]],
+                    min_length: int = 2) -> List[Tuple[str, str]]:
+    """
+    Tokenize text after folding it (see normalize_text.Normalizer.fold_text)
+
+    Returns:
+        List[Tuple[str, str]]: (token, original spelling) pairs, where the
+        original is the span of the cleaned raw text the token came from
+    """
+    cleaned = clean_text(text)
+    folded, offsets = fold(cleaned)
+    tokens = []
+    end = 0
+    # jieba pieces partition the input, so their running lengths are offsets
+    for piece in jieba.lcut(folded):
+        start, end = end, end + len(piece)
+        token = piece.strip()
+        if len(token) >= min_length and WORD_CHAR.search(token):
+            tokens.append((token, cleaned[offsets[start]:offsets[end]].strip()))
+    return tokens
+
+
+def document_tokens(text: str, normalizer: Optional[Normalizer] = None,
+                    variants: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Tokens of one document. With a normalizer the text is folded before
+    tokenizing and tokens go through the alias table; original spellings
+    that differ from their canonical token are recorded in variants.
+    """
+    if normalizer is None:
+        return tokenize(text)
+    tokens = []
+    for token, original in tokenize_folded(text, normalizer.fold_text):
+        canonical = normalizer(token)
+        if variants is not None and original != canonical:
+            variants[original] = canonical
+        tokens.append(canonical)
+    return tokens
+
+
+def note_text(note: dict) -> str:
+    """Text of a note used for word counting (title + description)."""
+    return f"{note.get('title') or ''}\n{note.get('desc') or ''}"
@@ -4,13 +4,14 @@
 Translate Chinese words to English using Google Cloud Translation API
 """
 
-import json
 import os
 import time
 from typing import List, Dict
 import requests
 from dotenv import load_dotenv
 
+from json_codec import decode_records, dump_json
+
 # Load environment variables
 load_dotenv()
 
@@ -63,13 +64,11 @@ class GoogleTranslateAPI:
 
 def load_word_frequency_data(file_path: str) -> List[Dict]:
     """Load word frequency data from JSON file"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return decode_records(file_path, 'word_frequency')
 
 def save_translated_data(data: List[Dict], file_path: str):
     """Save translated data to JSON file"""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    dump_json(data, file_path)
 
 def translate_words_with_delay(words_data: List[Dict], translator: GoogleTranslateAPI, 
                              delay: float = 0.1, max_words: int = None) -> List[Dict]:
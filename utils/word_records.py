@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact word records shared by the translation and labeling stages
+"""
+
+import json
+import sys
+from json.encoder import encode_basestring
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from json_codec import BACKEND, SCHEMAS, RecordValidationError, check_record, dump_json, format_report, loads
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Interned label tuples: most words share a handful of label combinations
+_LABEL_SETS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def intern_labels(labels: Iterable[str]) -> Tuple[str, ...]:
+    """Return the shared tuple of interned label strings for these labels."""
+    key = tuple(labels)
+    shared = _LABEL_SETS.get(key)
+    if shared is None:
+        shared = _LABEL_SETS[key] = tuple(sys.intern(l) for l in key)
+    return shared
+
+
+class WordRecord:
+    """
+    One vocabulary entry ({zh, en, frequency, reach, labels}).
+
+    Uses __slots__ instead of a per-row dict, and labels are shared interned
+    tuples, so thousands of words tagged ('other',) point at one object.
+    """
+
+    __slots__ = ('zh', 'en', 'frequency', 'reach', 'labels')
+
+    def __init__(self, zh: str, en: str = '', frequency: int = 0,
+                 labels: Optional[List[str]] = None, reach: Optional[int] = None):
+        self.zh = zh
+        self.en = en
+        self.frequency = frequency
+        self.reach = reach
+        self.labels = intern_labels(labels or ())
+
+    def set_labels(self, labels: Iterable[str]):
+        self.labels = intern_labels(labels)
+
+    def to_dict(self) -> dict:
+        data = {'zh': self.zh, 'en': self.en, 'frequency': self.frequency}
+        if self.reach is not None:
+            data['reach'] = self.reach
+        data['labels'] = list(self.labels)
+        return data
+
+    def __repr__(self) -> str:
+        return f"WordRecord({self.zh!r}, {self.en!r}, {self.frequency}, labels={self.labels})"
+
+
+def _struct_type(kind: str):
+    """msgspec Struct mirroring SCHEMAS[kind], so rows are type-checked while decoding."""
+    fields = []
+    for field, (types, required) in SCHEMAS[kind].items():
+        annotation = Union[tuple(List[str] if t is list else t for t in types)]
+        # Defaults are not validated, so optional fields can default to None
+        fields.append((field, annotation) if required else (field, annotation, None))
+    fields.sort(key=lambda f: len(f) == 3)  # fields without defaults come first
+    return msgspec.defstruct(f'_{kind}_struct', fields)
+
+
+_DECODERS: Dict[str, Any] = {}
+
+
+def _decode_structs(data: bytes, kind: str) -> Optional[List[WordRecord]]:
+    """Records via msgspec Structs; None if any row fails, so the caller can report every row."""
+    decoder = _DECODERS.get(kind)
+    if decoder is None:
+        decoder = _DECODERS[kind] = msgspec.json.Decoder(List[_struct_type(kind)])
+    try:
+        structs = decoder.decode(data)
+    except msgspec.ValidationError:
+        return None
+    if 'en' in SCHEMAS[kind]:
+        return [WordRecord(w.zh, w.en, w.frequency, w.labels, w.reach) for w in structs]
+    return [WordRecord(w.zh, '', w.frequency) for w in structs]
+
+
+_MISSING = object()
+_NO_LABELS: List[str] = []
+
+
+def _records_from_rows(rows: list, kind: str) -> List[str]:
+    """
+    Replace each decoded row by its WordRecord in place (None for rows that
+    fail SCHEMAS[kind]) and return the error lines. Rows whose values have
+    exactly the expected types take a fast path; anything else goes through
+    json_codec.check_record, which also describes the problem.
+    """
+    schema = SCHEMAS[kind]
+    with_en = 'en' in schema
+    with_extras = 'labels' in schema  # reach and labels
+    shared_labels = _LABEL_SETS.get
+    new = WordRecord.__new__
+    errors = []
+    for i, row in enumerate(rows):
+        if row.__class__ is dict:
+            zh = row.get('zh')
+            en = row.get('en') if with_en else ''
+            frequency = row.get('frequency')
+            reach = row.get('reach', _MISSING) if with_extras else _MISSING
+            labels = row.get('labels', _NO_LABELS) if with_extras else _NO_LABELS
+            if (zh.__class__ is str and en.__class__ is str and frequency.__class__ is int
+                    and (reach is _MISSING or reach.__class__ is int) and labels.__class__ is list):
+                key = tuple(labels)
+                shared = shared_labels(key)
+                if shared is None and all(l.__class__ is str for l in key):
+                    shared = intern_labels(key)
+                if shared is not None:
+                    record = rows[i] = new(WordRecord)
+                    record.zh = zh
+                    record.en = en
+                    record.frequency = frequency
+                    record.reach = None if reach is _MISSING else reach
+                    record.labels = shared
+                    continue
+        problem = check_record(row, schema)
+        if problem is None:
+            rows[i] = WordRecord(row['zh'], row.get('en', ''), row['frequency'], row.get('labels'), row.get('reach'))
+        else:
+            errors.append(f"row {i}: {problem}")
+            rows[i] = None
+    return errors
+
+
+def load_word_records(file_path: str, kind: str = 'labeled_word', strict: bool = False) -> List[WordRecord]:
+    """
+    Decode a word list JSON file into WordRecords, validating every row
+    and dropping (or, with strict, raising on) bad rows.
+
+    With msgspec the rows are checked while decoding into Structs;
+    otherwise the codec backend decodes them and each row is checked and
+    replaced in place by its WordRecord, so the dicts are freed as it goes
+    (msgspec also falls back to this when a row fails, to report every row).
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    if msgspec is not None:
+        records = _decode_structs(data, kind)
+        if records is not None:
+            return records
+
+    rows = loads(data)
+    if not isinstance(rows, list):
+        raise RecordValidationError(f"{file_path}: expected a JSON array of {kind} records", [])
+    errors = _records_from_rows(rows, kind)
+    if errors:
+        report = format_report(file_path, kind, len(rows), errors)
+        if strict:
+            raise RecordValidationError(report, errors)
+        print(report)
+        rows = [row for row in rows if row is not None]
+    return rows
+
+
+def _encode_record(record: WordRecord) -> str:
+    parts = [
+        '  {\n',
+        f'    "zh": {encode_basestring(record.zh)},\n',
+        f'    "en": {encode_basestring(record.en)},\n',
+        f'    "frequency": {int(record.frequency)},\n',
+    ]
+    if record.reach is not None:
+        parts.append(f'    "reach": {int(record.reach)},\n')
+    if record.labels:
+        labels = ',\n'.join(f'      {encode_basestring(l)}' for l in record.labels)
+        parts.append(f'    "labels": [\n{labels}\n    ]\n')
+    else:
+        parts.append('    "labels": []\n')
+    parts.append('  }')
+    return ''.join(parts)
+
+
+def save_word_records(records: Iterable[WordRecord], file_path: str):
+    """
+    Write records as json.dump([...], ensure_ascii=False, indent=2) of the
+    equivalent dicts would. orjson / msgspec encode them through
+    WordRecord.to_dict; with stdlib json they are streamed to the file
+    instead of building the whole document in memory.
+    """
+    if BACKEND != 'json':
+        dump_json(records if isinstance(records, list) else list(records), file_path,
+                  default=WordRecord.to_dict)
+        return
+    with open(file_path, 'w', encoding='utf-8') as f:
+        first = True
+        for record in records:
+            f.write('[\n' if first else ',\n')
+            f.write(_encode_record(record))
+            first = False
+        f.write('[]' if first else '\n]')
+
+
+def _compare_with_dicts(file_path: str):
+    """Memory and speed of the dict path vs the record path on a real file."""
+    import time
+    import tracemalloc
+
+    def measure(load, relabel):
+        tracemalloc.start()
+        start = time.perf_counter()
+        data = load()
+        loaded = time.perf_counter()
+        labeled = relabel(data)
+        done = time.perf_counter()
+        # Input and labeled output are both alive at this point, as in the labelers
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return len(labeled), current, peak, loaded - start, done - loaded
+
+    def load_dicts():
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def relabel_dicts(data):
+        # What the labelers do today: copy every row into a second dict
+        return [{'zh': w['zh'], 'en': w['en'], 'frequency': w['frequency'], 'labels': list(w['labels'])}
+                for w in data]
+
+    def relabel_records(data):
+        for w in data:
+            w.set_labels(w.labels)
+        return data
+
+    for name, load, relabel in (('dict', load_dicts, relabel_dicts),
+                                ('WordRecord', lambda: load_word_records(file_path), relabel_records)):
+        count, memory, peak, load_time, relabel_time = measure(load, relabel)
+        per_100k = memory / count * 100000 / (1024 * 1024)
+        print(f"  {name:>10}: {count} words, {memory / 1024 / 1024:.1f} MiB live "
+              f"({per_100k:.1f} MiB per 100k words), peak {peak / 1024 / 1024:.1f} MiB, "
+              f"load {load_time * 1000:.0f} ms, "
+              f"relabel pass {relabel_time * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    print("Dict rows vs WordRecord on word_frequency/words_with_labels.json:")
+    _compare_with_dicts('word_frequency/words_with_labels.json')
@@ -1,12 +1,26 @@
-import { defineConfig } from 'vite'
+import { defineConfig, loadEnv } from 'vite'
 import react from '@vitejs/plugin-react'
 
 // https://vitejs.dev/config/
-export default defineConfig({
-  plugins: [react()],
-  resolve: {
-    alias: {
-      "@": "/src",
+export default defineConfig(({ mode }) => {
+  // Optional local analytics service (python utils/analytics_server.py), e.g.
+  // ANALYTICS_API=http://127.0.0.1:8787 npm run dev
+  const analyticsApi = loadEnv(mode, '.', '').ANALYTICS_API
+
+  return {
+    plugins: [react()],
+    resolve: {
+      alias: {
+        "@": "/src",
+      },
     },
-  },
+    server: analyticsApi
+      ? {
+          proxy: {
+            '/data/labeled.json': analyticsApi,
+            '/data/country_analysis.json': analyticsApi,
+          },
+        }
+      : undefined,
+  }
 })